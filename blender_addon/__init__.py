@@ -14,13 +14,13 @@ from . import operators, panels, utils
 
 def register():
     # Register classes, panels, operators
+    operators.register()
     panels.register()
-    # (Add operators.register() if you add custom operators)
 
 def unregister():
     # Unregister classes, panels, operators
     panels.unregister()
-    # (Add operators.unregister() if you add custom operators)
+    operators.unregister()
 
 if __name__ == "__main__":
     register() 
\ No newline at end of file
@@ -1,2 +1,104 @@
 # operators.py
-# Define custom Blender operators for the add-on here. 
\ No newline at end of file
+# Define custom Blender operators for the add-on here.
+
+import time
+import bpy
+import numpy as np
+from bpy.types import Operator
+from . import utils
+
+POSE_COLLECTION_NAME = "Veewoy Pose"
+LANDMARK_OBJECT_PREFIX = "VW_"
+
+# Integer value of the 'LINEAR' keyframe interpolation enum, as used by foreach_set.
+KEYFRAME_INTERPOLATION_LINEAR = 1
+
+
+def get_landmark_objects(context, create=True):
+    """Return one empty per pose landmark, creating the collection and empties if needed."""
+    collection = bpy.data.collections.get(POSE_COLLECTION_NAME)
+    if collection is None:
+        if not create:
+            return []
+        collection = bpy.data.collections.new(POSE_COLLECTION_NAME)
+        context.scene.collection.children.link(collection)
+    objects = []
+    for name in utils.LANDMARK_NAMES:
+        obj_name = LANDMARK_OBJECT_PREFIX + name
+        obj = bpy.data.objects.get(obj_name)
+        if obj is None:
+            if not create:
+                return []
+            obj = bpy.data.objects.new(obj_name, None)
+            obj.empty_display_type = 'SPHERE'
+            obj.empty_display_size = 0.02
+            collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+
+def apply_pose(context, keypoints, scale=1.0):
+    """Move the landmark empties to a single frame of keypoints (N x 4, N <= 33)."""
+    locations = utils.keypoints_to_locations(np.asarray(keypoints), scale)
+    for obj, location in zip(get_landmark_objects(context), locations):
+        obj.location = location
+
+
+def bake_keypoints(context, keypoints, valid, frame_start=1, scale=1.0):
+    """
+    Bake a frames x landmarks x 4 keypoint array onto the landmark empties' location F-curves.
+    Keyframes are allocated with keyframe_points.add() and filled in bulk with foreach_set;
+    frames without a detected pose are left out. Returns the number of frames baked.
+    """
+    frames = np.flatnonzero(valid)
+    count = len(frames)
+    locations = utils.keypoints_to_locations(np.asarray(keypoints)[frames], scale)
+    co = np.empty(count * 2, dtype=np.float32)
+    co[0::2] = frames + frame_start
+    interpolation = np.full(count, KEYFRAME_INTERPOLATION_LINEAR, dtype=np.int32)
+
+    for landmark_idx, obj in enumerate(get_landmark_objects(context)):
+        if obj.animation_data is None:
+            obj.animation_data_create()
+        action = obj.animation_data.action
+        if action is None:
+            action = bpy.data.actions.new(name=obj.name + "Action")
+            obj.animation_data.action = action
+        for fcurve in [fc for fc in action.fcurves if fc.data_path == 'location']:
+            action.fcurves.remove(fcurve)
+        for axis in range(3):
+            fcurve = action.fcurves.new('location', index=axis, action_group=obj.name)
+            fcurve.keyframe_points.add(count)
+            co[1::2] = locations[:, landmark_idx, axis]
+            fcurve.keyframe_points.foreach_set('co', co)
+            fcurve.keyframe_points.foreach_set('interpolation', interpolation)
+            fcurve.update()
+    return count
+
+
+class ANIM_OT_bake_keypoints(Operator):
+    bl_idname = "anim.bake_keypoints"
+    bl_label = "Bake Keypoints"
+    bl_description = "Bake pose keypoints to animated landmark empties"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        props = context.scene.import_data_props
+        try:
+            started = time.perf_counter()
+            keypoints, valid = utils.keypoints_to_array(utils.load_keypoints(props.keypoints_path))
+            count = bake_keypoints(context, keypoints, valid, context.scene.frame_start, props.bake_scale)
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            self.report({'ERROR'}, f"Failed to bake keypoints: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Baked {count} frames x {len(utils.LANDMARK_NAMES)} landmarks in {elapsed:.2f}s.")
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(ANIM_OT_bake_keypoints)
+
+
+def unregister():
+    bpy.utils.unregister_class(ANIM_OT_bake_keypoints)
\ No newline at end of file
@@ -2,17 +2,17 @@
 # Define custom Blender UI panels for the add-on here.
 
 import bpy
-from bpy.props import StringProperty, BoolProperty
+from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty
 from bpy.types import Panel, Operator, PropertyGroup
-from . import utils
+from . import operators, utils
+import json
 import threading
 import websocket
-import time
 
 class ImportDataProperties(PropertyGroup):
     keypoints_path: StringProperty(
         name="Keypoints JSON",
-        description="Path to keypoints.json file",
+        description="Path to keypoints.json (or streamed .ndjson / binary .vwkp) file",
         subtype='FILE_PATH'
     )
     phonemes_path: StringProperty(
@@ -20,6 +20,12 @@ class ImportDataProperties(PropertyGroup):
         description="Path to phonemes.json file",
         subtype='FILE_PATH'
     )
+    bake_scale: FloatProperty(
+        name="Bake Scale",
+        description="Size in Blender units of the full camera frame when baking keypoints",
+        default=2.0,
+        min=0.001
+    )
 
 class IMPORT_OT_load_data(Operator):
     bl_idname = "import.load_data"
@@ -29,7 +35,7 @@ class IMPORT_OT_load_data(Operator):
     def execute(self, context):
         props = context.scene.import_data_props
         try:
-            keypoints = utils.load_keypoints_json(props.keypoints_path)
+            keypoints = utils.load_keypoints(props.keypoints_path)
             phonemes = utils.load_phonemes_json(props.phonemes_path)
             self.report({'INFO'}, f"Loaded {len(keypoints)} frames and {len(phonemes)} phoneme entries.")
             # Store or process data as needed (e.g., attach to scene, cache, etc.)
@@ -53,6 +59,8 @@ class IMPORT_PT_data_panel(Panel):
         layout.prop(props, "keypoints_path")
         layout.prop(props, "phonemes_path")
         layout.operator("import.load_data", text="Import Data")
+        layout.prop(props, "bake_scale")
+        layout.operator("anim.bake_keypoints", text="Bake Keypoints")
 
 class LiveLinkProperties(PropertyGroup):
     link_status: StringProperty(
@@ -70,45 +78,123 @@ class LiveLinkProperties(PropertyGroup):
         description="WebSocket server URL",
         default="ws://localhost:8765"
     )
+    wire_format: EnumProperty(
+        name="Wire Format",
+        description="Preferred live link message format (the server falls back to JSON if unsupported)",
+        items=[
+            ('i16', "Binary int16", "Quantized 16-bit landmarks, smallest payload"),
+            ('f32', "Binary float32", "Full-precision packed landmarks"),
+            ('json', "JSON", "Text messages"),
+        ],
+        default='f32'
+    )
+
+class LiveLinkReceiver:
+    """
+    Receives live link messages on a background thread and parses them into a LatestFrameQueue.
+    Nothing here touches bpy; the main-thread timer reads `status` and drains the queue.
+    """
+
+    def __init__(self):
+        self.queue = utils.LatestFrameQueue(maxlen=4)
+        self.status = "Disconnected"
+        self.connected = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._ws = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, url, wire_format='json'):
+        self._stop_event.clear()
+        self.queue.clear()
+        self._thread = threading.Thread(target=self._run, args=(url, wire_format), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self.status = "Disconnecting..."
+
+    def _run(self, url, wire_format):
+        try:
+            self.status = "Connecting..."
+            self._ws = websocket.WebSocket()
+            self._ws.connect(url)
+            # Offer the preferred format first; JSON is always acceptable as a fallback.
+            formats = [wire_format] + [f for f in ('f32', 'json') if f != wire_format]
+            self._ws.send(json.dumps({"type": "hello", "formats": formats}))
+            # Wake up periodically so a disconnect request is noticed even if the sender goes quiet.
+            self._ws.settimeout(0.5)
+            self.connected = True
+            self.status = "Connected"
+            while not self._stop_event.is_set():
+                try:
+                    msg = self._ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    continue
+                if isinstance(msg, str):
+                    data = json.loads(msg)
+                    if data.get("type") == "hello":
+                        self.status = f"Connected ({data.get('format', 'json')})"
+                        continue
+                    pose = utils.pose_from_json(data)
+                else:
+                    pose = utils.decode_pose_binary(msg)
+                if pose is not None:
+                    self.queue.put(pose)
+        except Exception as e:
+            self.status = f"Error: {e}"
+        finally:
+            if self._ws:
+                self._ws.close()
+            self.connected = False
+            if not self.status.startswith("Error"):
+                self.status = "Disconnected"
+
+
+_receiver = LiveLinkReceiver()
+
+# Main-thread polling interval for applying received poses (seconds).
+LIVELINK_TIMER_INTERVAL = 1.0 / 60.0
+
+
+def _livelink_timer():
+    """bpy.app.timers callback: mirror receiver status into the UI and apply only the newest pose."""
+    scene = bpy.context.scene
+    if scene is None:
+        return LIVELINK_TIMER_INTERVAL
+    props = scene.livelink_props
+    if props.link_status != _receiver.status:
+        props.link_status = _receiver.status
+    if props.is_connected != _receiver.connected:
+        props.is_connected = _receiver.connected
+    pose = _receiver.queue.get_latest()
+    if pose is not None:
+        _, keypoints = pose
+        operators.apply_pose(bpy.context, keypoints, scene.import_data_props.bake_scale)
+    if not _receiver.running:
+        return None
+    return LIVELINK_TIMER_INTERVAL
+
 
 class LIVELINK_OT_toggle_link(Operator):
     bl_idname = "livelink.toggle_link"
     bl_label = "Connect/Disconnect Live Link"
     bl_description = "Connect or disconnect to the live link WebSocket server"
 
-    _ws_thread = None
-    _ws = None
-
     def execute(self, context):
         props = context.scene.livelink_props
-        if not props.is_connected:
+        if not _receiver.running:
             # Connect
-            def ws_thread_func():
-                try:
-                    props.link_status = "Connecting..."
-                    self._ws = websocket.WebSocket()
-                    self._ws.connect(props.ws_url)
-                    props.is_connected = True
-                    props.link_status = "Connected"
-                    while props.is_connected:
-                        msg = self._ws.recv()
-                        # For now, just print or store the message
-                        print(f"Received: {msg}")
-                        time.sleep(0.01)
-                except Exception as e:
-                    props.link_status = f"Error: {e}"
-                    props.is_connected = False
-                finally:
-                    if self._ws:
-                        self._ws.close()
-                    props.link_status = "Disconnected"
-                    props.is_connected = False
-            self._ws_thread = threading.Thread(target=ws_thread_func, daemon=True)
-            self._ws_thread.start()
+            _receiver.start(props.ws_url, props.wire_format)
+            if not bpy.app.timers.is_registered(_livelink_timer):
+                bpy.app.timers.register(_livelink_timer, first_interval=LIVELINK_TIMER_INTERVAL)
         else:
             # Disconnect
-            props.is_connected = False
-            props.link_status = "Disconnecting..."
+            _receiver.stop()
+        props.link_status = _receiver.status
         return {'FINISHED'}
 
 class LIVELINK_PT_panel(Panel):
@@ -123,6 +209,7 @@ class LIVELINK_PT_panel(Panel):
         props = context.scene.livelink_props
         layout.label(text=f"Status: {props.link_status}")
         layout.prop(props, "ws_url")
+        layout.prop(props, "wire_format")
         layout.operator("livelink.toggle_link", text=("Disconnect" if props.is_connected else "Connect"))
 
 def register():
@@ -136,6 +223,9 @@ def register():
     bpy.types.Scene.livelink_props = bpy.props.PointerProperty(type=LiveLinkProperties)
 
 def unregister():
+    _receiver.stop()
+    if bpy.app.timers.is_registered(_livelink_timer):
+        bpy.app.timers.unregister(_livelink_timer)
     bpy.utils.unregister_class(ImportDataProperties)
     bpy.utils.unregister_class(IMPORT_OT_load_data)
     bpy.utils.unregister_class(IMPORT_PT_data_panel)
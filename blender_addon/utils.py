@@ -3,7 +3,36 @@
 # Requires: websocket-client (pip install websocket-client)
 
 import json
+import os
+import struct
+import threading
+from collections import deque
 import bpy
+import numpy as np
+
+# Binary keypoints layout, must match external_tools/pose_estimation.py
+KEYPOINTS_BINARY_MAGIC = b'VWKP'
+KEYPOINTS_BINARY_VERSION = 1
+KEYPOINTS_BINARY_HEADER = struct.Struct('<4sHHIHHf')
+KEYPOINTS_MASK_VALID = 1
+KEYPOINTS_MASK_INTERPOLATED = 2
+
+# Live link binary wire format, must match standalone_gui/livelink_protocol.py
+LIVELINK_MAGIC = b'VWLL'
+LIVELINK_VERSION = 1
+LIVELINK_HEADER = struct.Struct('<4sBBHIdI')
+LIVELINK_ENCODING_DTYPES = {0: '<f4', 1: '<i2'}
+LIVELINK_I16_SCALE = 8192.0
+
+# MediaPipe Pose landmark order
+LANDMARK_NAMES = [
+    'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer', 'right_eye_inner', 'right_eye', 'right_eye_outer',
+    'left_ear', 'right_ear', 'mouth_left', 'mouth_right', 'left_shoulder', 'right_shoulder',
+    'left_elbow', 'right_elbow', 'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
+    'left_index', 'right_index', 'left_thumb', 'right_thumb', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index',
+]
 
 
 def load_keypoints_json(filepath):
@@ -13,8 +42,206 @@ def load_keypoints_json(filepath):
     return data
 
 
+def load_keypoints_ndjson(filepath):
+    """
+    Load pose keypoints from a streamed NDJSON file (one frame per line).
+    A partially written last line is ignored, so files can be read while extraction is still running.
+    """
+    data = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            line = line.strip()
+            if line:
+                data.append(json.loads(line))
+    return data
+
+
+class BinaryKeypoints:
+    """
+    Memory-mapped view of a binary keypoints file.
+    `keypoints` is a frames x landmarks x 4 (x, y, z, visibility) float32 array and `valid` a per-frame bool mask;
+    slicing the keypoints only reads the requested frames from disk. `interpolated` flags frames filled in between
+    inferred frames by an adaptive-stride extraction.
+    """
+
+    def __init__(self, filepath):
+        with open(filepath, 'rb') as f:
+            header = f.read(KEYPOINTS_BINARY_HEADER.size)
+        if len(header) < KEYPOINTS_BINARY_HEADER.size:
+            raise ValueError(f"Truncated keypoints file: {filepath}")
+        magic, version, header_size, num_frames, num_landmarks, num_channels, fps = \
+            KEYPOINTS_BINARY_HEADER.unpack(header)
+        if magic != KEYPOINTS_BINARY_MAGIC:
+            raise ValueError(f"Not a binary keypoints file: {filepath}")
+        if version > KEYPOINTS_BINARY_VERSION:
+            raise ValueError(f"Unsupported binary keypoints version {version}: {filepath}")
+        self.filepath = filepath
+        self.fps = fps
+        shape = (num_frames, num_landmarks, num_channels)
+        if num_frames == 0:
+            self.keypoints = np.zeros(shape, dtype='<f4')
+            self.valid = np.zeros(0, dtype=bool)
+            self.interpolated = np.zeros(0, dtype=bool)
+            return
+        self.keypoints = np.memmap(filepath, dtype='<f4', mode='r', offset=header_size, shape=shape)
+        mask_offset = header_size + self.keypoints.nbytes
+        mask = np.memmap(filepath, dtype=np.uint8, mode='r', offset=mask_offset, shape=(num_frames,))
+        self.valid = (mask & KEYPOINTS_MASK_VALID) != 0
+        self.interpolated = (mask & KEYPOINTS_MASK_INTERPOLATED) != 0
+
+    def __len__(self):
+        return self.keypoints.shape[0]
+
+    def frame_range(self, start, stop):
+        """Return (keypoints, valid) for frames [start, stop) without reading the rest of the file."""
+        return self.keypoints[start:stop], self.valid[start:stop]
+
+
+def load_keypoints_binary(filepath):
+    """Memory-map pose keypoints from a binary (.vwkp) file."""
+    return BinaryKeypoints(filepath)
+
+
+def load_keypoints(filepath):
+    """Load pose keypoints, picking the reader from the file extension."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext in ('.ndjson', '.jsonl'):
+        return load_keypoints_ndjson(filepath)
+    if ext in ('.vwkp', '.bin'):
+        return load_keypoints_binary(filepath)
+    return load_keypoints_json(filepath)
+
+
+def keypoints_to_array(keypoints):
+    """
+    Convert loaded keypoints to (array, valid): a frames x landmarks x 4 float32 array and a per-frame bool mask.
+    Accepts the JSON/NDJSON frame list or a BinaryKeypoints view (returned as-is, without copying).
+    """
+    if isinstance(keypoints, BinaryKeypoints):
+        return keypoints.keypoints, keypoints.valid
+    num_frames = max((entry['frame'] for entry in keypoints), default=-1) + 1
+    array = np.zeros((num_frames, len(LANDMARK_NAMES), 4), dtype=np.float32)
+    valid = np.zeros(num_frames, dtype=bool)
+    for entry in keypoints:
+        kps = entry['keypoints']
+        if kps:
+            array[entry['frame'], :len(kps)] = [(kp['x'], kp['y'], kp['z'], kp['visibility']) for kp in kps]
+            valid[entry['frame']] = True
+    return array, valid
+
+
+def keypoints_to_locations(array, scale=1.0):
+    """
+    Map normalized image keypoints (..., 4) to Blender locations (..., 3):
+    image x to X, image y (down) to Z (up) and MediaPipe depth to Y, centered on the image.
+    """
+    locations = np.empty(array.shape[:-1] + (3,), dtype=np.float32)
+    locations[..., 0] = (array[..., 0] - 0.5) * scale
+    locations[..., 1] = array[..., 2] * scale
+    locations[..., 2] = (0.5 - array[..., 1]) * scale
+    return locations
+
+
+class LatestFrameQueue:
+    """
+    Bounded, thread-safe hand-off from the live link socket thread to Blender's main thread.
+    Producers never block: once `maxlen` items are waiting the oldest is dropped, and the consumer
+    only takes the newest item, discarding anything older.
+    """
+
+    def __init__(self, maxlen=4):
+        self._items = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+
+    def get_latest(self):
+        """Return the newest item (or None) and drop everything older."""
+        with self._lock:
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def decode_pose_binary(message):
+    """Decode a binary live link pose into (frame, keypoints) with keypoints as an N x 4 float32 array."""
+    magic, version, encoding, num_landmarks, seq, timestamp, frame = LIVELINK_HEADER.unpack_from(message)
+    if magic != LIVELINK_MAGIC or version > LIVELINK_VERSION:
+        raise ValueError("Unknown live link binary message")
+    dtype = LIVELINK_ENCODING_DTYPES[encoding]
+    keypoints = np.frombuffer(message, dtype=dtype, count=num_landmarks * 4, offset=LIVELINK_HEADER.size)
+    keypoints = keypoints.reshape(num_landmarks, 4).astype(np.float32)
+    if encoding == 1:
+        keypoints /= LIVELINK_I16_SCALE
+    return frame, keypoints
+
+
+def pose_from_json(data):
+    """
+    Convert a decoded live link JSON message into (frame, keypoints) with keypoints as an N x 4 float32 array,
+    or None if it is not a pose message. Missing z/visibility default to 0 and 1.
+    """
+    if data.get('type') != 'pose':
+        return None
+    kps = data.get('keypoints') or []
+    array = np.array([(kp.get('x', 0.0), kp.get('y', 0.0), kp.get('z', 0.0), kp.get('visibility', 1.0))
+                      for kp in kps], dtype=np.float32).reshape(-1, 4)
+    return data.get('frame', 0), array
+
+
+def parse_pose_message(message):
+    """Parse a live link message (binary bytes or JSON text) into (frame, keypoints), or None if not a pose."""
+    if isinstance(message, (bytes, bytearray)):
+        return decode_pose_binary(message)
+    return pose_from_json(json.loads(message))
+
+
 def load_phonemes_json(filepath):
     """Load phoneme timings from a JSON file."""
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    return data 
\ No newline at end of file
+    return data 
+
+
+class VisemeTrack:
+    """Per-frame viseme indices produced by external_tools/viseme_track.py; lookups are O(1) per frame."""
+
+    def __init__(self, filepath):
+        with np.load(filepath) as data:
+            self.visemes = data['visemes']
+            self.fps = float(data['fps'])
+            self.names = [str(name) for name in data['names']]
+
+    def __len__(self):
+        return len(self.visemes)
+
+    def viseme_index_at(self, frame, scene_fps=None):
+        """Viseme index at a scene frame (resampled if the scene fps differs); 'rest' outside the track."""
+        if scene_fps and scene_fps != self.fps:
+            frame = int(round(frame * self.fps / scene_fps))
+        if 0 <= frame < len(self.visemes):
+            return int(self.visemes[frame])
+        return 0
+
+    def viseme_at(self, frame, scene_fps=None):
+        """Viseme name (mouth shape) at a scene frame."""
+        return self.names[self.viseme_index_at(frame, scene_fps)]
+
+
+def load_viseme_track(filepath):
+    """Load a per-frame viseme track (.npz)."""
+    return VisemeTrack(filepath)
\ No newline at end of file
@@ -2,19 +2,57 @@
 # Transcribes audio using OpenAI Whisper.
 
 import argparse
-import whisper
+import multiprocessing
+import numpy as np
 import os
+import sys
 import json
+import time
+from contextlib import redirect_stdout
+from lazy_import import lazy_module
+from perf import PerfRecorder, add_perf_arguments
+from result_cache import ResultCache, add_cache_arguments
+
+# Whisper pulls in torch; import it on first use so argument parsing and `--help` stay instant
+whisper = lazy_module("whisper")
+
+TOOL_VERSION = "1"
+
+# Whisper models already loaded in this process, keyed by model size.
+_loaded_models = {}
+
+# Timers and counters for this process (model load, decode, VAD, inference, serialization); see --perf-json.
+_perf = PerfRecorder("audio_transcribe")
+
+
+def get_model(model_size="base"):
+    """Load a Whisper model once per process and reuse it for later calls."""
+    model = _loaded_models.get(model_size)
+    if model is None:
+        print(f"Loading Whisper model '{model_size}'...")
+        with _perf.timer("model_load"):
+            model = whisper.load_model(model_size)
+        _loaded_models[model_size] = model
+    return model
 
 
 def transcribe_audio(audio_path, transcript_txt_path, transcript_json_path, model_size="base"):
     """
     Transcribe audio using OpenAI Whisper and save transcript as .txt and .json (with word-level timestamps).
     """
-    model = whisper.load_model(model_size)
+    model = get_model(model_size)
     print(f"Transcribing {audio_path} with Whisper model '{model_size}'...")
-    result = model.transcribe(audio_path, word_timestamps=True)
+    with _perf.timer("decode"):
+        audio = whisper.load_audio(audio_path)
+    _perf.count("audio_seconds", round(len(audio) / whisper.audio.SAMPLE_RATE, 3))
+    with _perf.timer("inference"):
+        result = model.transcribe(audio, word_timestamps=True)
+    save_transcript(result, transcript_txt_path, transcript_json_path)
 
+
+def save_transcript(result, transcript_txt_path, transcript_json_path):
+    """Write a Whisper result as a plain text transcript and a full JSON transcript."""
+    started = time.perf_counter()
     # Save plain text transcript (for Gentle)
     with open(transcript_txt_path, "w", encoding="utf-8") as txt_file:
         txt_file.write(result["text"].strip() + "\n")
@@ -23,23 +61,244 @@ def transcribe_audio(audio_path, transcript_txt_path, transcript_json_path, mode
     # Save full JSON (for reference/future use)
     with open(transcript_json_path, "w", encoding="utf-8") as json_file:
         json.dump(result, json_file, ensure_ascii=False, indent=2)
+    _perf.add_time("serialize", time.perf_counter() - started)
     print(f"Full transcript with timestamps saved to {transcript_json_path}")
 
 
+def find_speech_chunks(audio, sample_rate=None, chunk_seconds=120.0,
+                       min_silence_seconds=0.3, frame_seconds=0.03, silence_db=-35.0):
+    """
+    Split audio into (start, end) sample ranges of at most `chunk_seconds`, cutting inside silences.
+
+    Uses a simple energy VAD: frames more than `silence_db` below the loudest frames count as silence,
+    and each cut is placed in the middle of the latest silence run of at least `min_silence_seconds`
+    that falls in the second half of the chunk. Falls back to a hard cut when there is no such pause.
+    `sample_rate` defaults to Whisper's input rate.
+    """
+    if sample_rate is None:
+        sample_rate = whisper.audio.SAMPLE_RATE
+    total = len(audio)
+    max_len = int(chunk_seconds * sample_rate)
+    if total <= max_len:
+        return [(0, total)]
+
+    frame_len = max(1, int(frame_seconds * sample_rate))
+    num_frames = total // frame_len
+    frames = audio[:num_frames * frame_len].reshape(num_frames, frame_len)
+    rms_db = 20.0 * np.log10(np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1)) + 1e-10)
+    silent = rms_db < np.percentile(rms_db, 95) + silence_db
+
+    # Centers (in samples) of silence runs long enough to cut at.
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    min_run = max(1, int(min_silence_seconds / frame_seconds))
+    long_runs = (run_ends - run_starts) >= min_run
+    cut_points = ((run_starts[long_runs] + run_ends[long_runs]) // 2) * frame_len
+
+    chunks = []
+    start = 0
+    while total - start > max_len:
+        window = cut_points[(cut_points > start + max_len // 2) & (cut_points <= start + max_len)]
+        end = int(window[-1]) if len(window) else start + max_len
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, total))
+    return chunks
+
+
+def _init_chunk_worker(model_size, torch_threads):
+    """Pool initializer: limit per-process threads and load the model once per worker."""
+    import torch
+    torch.set_num_threads(torch_threads)
+    with redirect_stdout(sys.stderr):
+        get_model(model_size)
+
+
+def _transcribe_chunk(task):
+    """
+    Worker: transcribe one chunk of samples and shift its timestamps onto the global timeline.
+    Returns (result, inference seconds) so the parent can account for time spent in the workers.
+    """
+    model_size, offset, samples = task
+    model = get_model(model_size)
+    started = time.perf_counter()
+    result = model.transcribe(samples, word_timestamps=True)
+    seconds = time.perf_counter() - started
+    for segment in result["segments"]:
+        segment["start"] += offset
+        segment["end"] += offset
+        for word in segment.get("words", []):
+            word["start"] += offset
+            word["end"] += offset
+    return result, seconds
+
+
+def merge_chunk_results(results, offsets):
+    """Merge per-chunk Whisper results into one result with the same shape as `model.transcribe`."""
+    merged = {"text": "", "segments": [], "language": results[0].get("language") if results else None}
+    for result, offset in zip(results, offsets):
+        merged["text"] += result["text"]
+        for segment in result["segments"]:
+            segment["id"] = len(merged["segments"])
+            # `seek` is measured in 10 ms mel frames from the start of the decoded audio.
+            segment["seek"] = segment.get("seek", 0) + int(round(offset * 100))
+            merged["segments"].append(segment)
+    return merged
+
+
+def transcribe_audio_chunked(audio_path, transcript_txt_path, transcript_json_path, model_size="base",
+                             workers=None, chunk_seconds=120.0):
+    """
+    Transcribe long audio by splitting it at silences and transcribing the chunks in a process pool.
+    Word and segment timestamps are shifted back onto the global timeline, and the output has the
+    same shape as `transcribe_audio`.
+    """
+    workers = workers or os.cpu_count() or 1
+    with _perf.timer("decode"):
+        audio = whisper.load_audio(audio_path)
+    sample_rate = whisper.audio.SAMPLE_RATE
+    with _perf.timer("vad"):
+        chunks = find_speech_chunks(audio, sample_rate, chunk_seconds)
+    if len(chunks) == 1 or workers == 1:
+        transcribe_audio(audio_path, transcript_txt_path, transcript_json_path, model_size)
+        return
+
+    offsets = [start / sample_rate for start, _ in chunks]
+    tasks = [(model_size, offset, audio[start:end]) for offset, (start, end) in zip(offsets, chunks)]
+    _perf.count("audio_seconds", round(len(audio) / sample_rate, 3))
+    _perf.count("chunks", len(tasks))
+    workers = min(workers, len(tasks))
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Transcribing {audio_path} in {len(tasks)} chunks on {workers} workers with Whisper model '{model_size}'...")
+    with multiprocessing.Pool(processes=workers, initializer=_init_chunk_worker,
+                              initargs=(model_size, torch_threads)) as pool:
+        results = []
+        for result, seconds in pool.map(_transcribe_chunk, tasks, chunksize=1):
+            _perf.add_time("inference", seconds)
+            results.append(result)
+
+    save_transcript(merge_chunk_results(results, offsets), transcript_txt_path, transcript_json_path)
+
+
+def transcribe_with_cache(audio_path, transcript_txt_path, transcript_json_path, model_size="base", cache=None,
+                          workers=1, chunk_seconds=120.0):
+    """Run the transcription, returning stored outputs instead when `cache` has a matching entry."""
+    outputs = {"transcript.txt": transcript_txt_path, "transcript.json": transcript_json_path}
+    if cache:
+        params = {"model_size": model_size}
+        if workers != 1:
+            params["vad_chunk_seconds"] = chunk_seconds
+        with _perf.timer("cache_lookup"):
+            cache_key = cache.make_key("audio_transcribe", TOOL_VERSION, [audio_path], params)
+            hit = cache.fetch(cache_key, outputs)
+        if hit:
+            _perf.count("cache_hits")
+            print(f"Cache hit. Transcripts: {transcript_txt_path}, {transcript_json_path}")
+            return True
+
+    if workers != 1:
+        transcribe_audio_chunked(audio_path, transcript_txt_path, transcript_json_path, model_size,
+                                 workers, chunk_seconds)
+    else:
+        transcribe_audio(audio_path, transcript_txt_path, transcript_json_path, model_size)
+
+    if cache:
+        with _perf.timer("cache_store"):
+            cache.store(cache_key, outputs)
+    return False
+
+
+def serve(default_model="base", preload=(), cache=None, stdin=None, stdout=None, perf_json=None):
+    """
+    Run as a long-lived worker that keeps Whisper models loaded between jobs.
+
+    Reads one JSON job per line from stdin, e.g.
+        {"id": 1, "audio": "take1.wav", "txt": "take1.txt", "json": "take1.json", "model": "base"}
+    and writes one JSON reply per line to stdout:
+        {"id": 1, "ok": true, "cached": false, "seconds": 12.3}
+    A {"cmd": "shutdown"} line or end of input stops the worker. Log output goes to stderr.
+    With `perf_json`, the performance summary is rewritten after every job.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    def reply(message):
+        stdout.write(json.dumps(message) + "\n")
+        stdout.flush()
+
+    with redirect_stdout(sys.stderr):
+        for model_size in preload:
+            get_model(model_size)
+        print(f"Whisper worker ready (models loaded: {', '.join(_loaded_models) or 'none'})")
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            if job.get("cmd") == "shutdown":
+                reply({"id": job_id, "ok": True})
+                break
+            audio_path = job["audio"]
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+            base = os.path.splitext(audio_path)[0]
+            txt_path = job.get("txt") or base + ".txt"
+            json_path = job.get("json") or base + ".json"
+            started = time.perf_counter()
+            with redirect_stdout(sys.stderr):
+                cached = transcribe_with_cache(audio_path, txt_path, json_path,
+                                               job.get("model", default_model), cache)
+            _perf.count("jobs")
+            reply({"id": job_id, "ok": True, "cached": cached, "txt": txt_path, "json": json_path,
+                   "seconds": round(time.perf_counter() - started, 3)})
+        except Exception as e:
+            _perf.count("failed_jobs")
+            reply({"id": job_id, "ok": False, "error": str(e)})
+        if perf_json:
+            _perf.write_json(perf_json)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Transcribe audio using OpenAI Whisper.")
-    parser.add_argument("--audio", required=True, help="Path to audio file (wav, mp3, etc.)")
+    parser.add_argument("--audio", help="Path to audio file (wav, mp3, etc.)")
     parser.add_argument("--txt", default="transcript.txt", help="Output plain text transcript file")
     parser.add_argument("--json", default="transcript.json", help="Output JSON transcript file")
     parser.add_argument("--model", default="base", help="Whisper model size (tiny, base, small, medium, large)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Split long audio at silences and transcribe chunks in N processes (0 = one per CPU core)")
+    parser.add_argument("--chunk-seconds", type=float, default=120.0,
+                        help="Maximum chunk length for --workers mode")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a persistent worker reading JSON jobs from stdin (see serve())")
+    parser.add_argument("--preload", default="",
+                        help="Comma-separated model sizes to load at worker start-up (with --serve)")
+    add_cache_arguments(parser)
+    add_perf_arguments(parser)
     args = parser.parse_args()
 
-    if not os.path.exists(args.audio):
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    _perf.set_info(audio=args.audio, model=args.model, workers=args.workers, serve=args.serve)
+
+    if args.serve:
+        preload = [m.strip() for m in args.preload.split(",") if m.strip()]
+        serve(args.model, preload, cache, perf_json=args.perf_json)
+        return
+
+    if not args.audio or not os.path.exists(args.audio):
         print(f"Audio file not found: {args.audio}")
         return
 
-    transcribe_audio(args.audio, args.txt, args.json, args.model)
+    transcribe_with_cache(args.audio, args.txt, args.json, args.model, cache,
+                          workers=args.workers, chunk_seconds=args.chunk_seconds)
+    print(_perf.format_report(item_name="call"), file=sys.stderr)
+    if args.perf_json:
+        _perf.write_json(args.perf_json)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
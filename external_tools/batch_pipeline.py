@@ -0,0 +1,327 @@
+# batch_pipeline.py
+# Runs pose extraction, transcription and phoneme alignment for many takes as one dependency graph.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from perf import PerfRecorder, add_perf_arguments
+from result_cache import add_cache_arguments
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a")
+KEYPOINT_EXTENSIONS = {"json": ".json", "ndjson": ".ndjson", "binary": ".vwkp"}
+
+# Outputs are written under a temporary name and renamed once the stage succeeds, so a crashed or killed
+# run never leaves a file that looks up to date.
+TEMP_PREFIX = ".tmp-"
+# Sidecar written by pose_estimation.py while a streamed extraction is unfinished; a temp output that has one
+# is kept after a failure or timeout so the next run resumes it instead of starting over.
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+
+class Take:
+    """One recording: a name plus an optional video and an optional audio file."""
+
+    def __init__(self, name, video=None, audio=None):
+        self.name = name
+        self.video = video
+        self.audio = audio
+
+
+class Task:
+    """
+    One stage of one take: a tool command line, the files it reads and writes, and the tasks it waits for.
+    """
+
+    def __init__(self, take, stage, command, inputs, outputs, deps=()):
+        self.take = take
+        self.stage = stage
+        self.command = command
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = list(deps)
+        self.state = "pending"  # pending, running, done, skipped (up to date), failed, blocked
+        self.message = ""
+        self.seconds = 0.0
+
+    @property
+    def label(self):
+        return f"{self.take.name}/{self.stage}"
+
+    def is_up_to_date(self):
+        """True if every input and output exists and every output is newer than every input."""
+        if not all(os.path.exists(p) for p in self.inputs + self.outputs):
+            return False
+        newest_input = max((os.path.getmtime(p) for p in self.inputs), default=0.0)
+        return min(os.path.getmtime(p) for p in self.outputs) >= newest_input
+
+
+def discover_takes(input_dir):
+    """
+    Group the media files in a directory into takes by file name stem, e.g. take01.mp4 + take01.wav.
+    """
+    takes = {}
+    for entry in sorted(os.listdir(input_dir)):
+        stem, ext = os.path.splitext(entry)
+        path = os.path.join(input_dir, entry)
+        ext = ext.lower()
+        if ext in VIDEO_EXTENSIONS:
+            takes.setdefault(stem, Take(stem)).video = path
+        elif ext in AUDIO_EXTENSIONS:
+            takes.setdefault(stem, Take(stem)).audio = path
+    return list(takes.values())
+
+
+def load_manifest(manifest_path):
+    """
+    Read takes from a JSON manifest: a list (or {"takes": [...]}) of {"name", "video", "audio"} objects.
+    Relative paths are resolved against the manifest's directory.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("takes", [])
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    def resolve(path):
+        return os.path.join(base_dir, path) if path else None
+
+    takes = []
+    for i, entry in enumerate(data):
+        video, audio = resolve(entry.get("video")), resolve(entry.get("audio"))
+        name = entry.get("name") or os.path.splitext(os.path.basename(video or audio or f"take{i:03d}"))[0]
+        takes.append(Take(name, video, audio))
+    return takes
+
+
+def tool_command(script, *args):
+    return [sys.executable, os.path.join(TOOLS_DIR, script)] + [str(a) for a in args]
+
+
+def temp_path(path):
+    return os.path.join(os.path.dirname(path), TEMP_PREFIX + os.path.basename(path))
+
+
+def plan_take(take, output_dir, args):
+    """Build the task graph for one take: pose is independent, alignment waits for the transcript."""
+    take_dir = os.path.join(output_dir, take.name)
+    log_dir = os.path.join(take_dir, "logs")
+    cache_args = (["--no-cache"] if args.no_cache else []) + (["--cache-dir", args.cache_dir] if args.cache_dir else [])
+    tasks = []
+
+    if take.video:
+        keypoints = os.path.join(take_dir, "keypoints" + KEYPOINT_EXTENSIONS[args.pose_format])
+        # Serial streamed extraction checkpoints its progress, so a rerun continues an interrupted take
+        resume_args = ["--resume"] if args.pose_format != "json" and args.pose_workers == 1 else []
+        tasks.append(Task(take, "pose", tool_command(
+            "pose_estimation.py", "--input", take.video, "--output", temp_path(keypoints),
+            "--format", args.pose_format, "--workers", args.pose_workers, *resume_args, *cache_args,
+            "--perf-json", os.path.join(log_dir, "pose.perf.json")),
+            [take.video], [keypoints]))
+
+    if take.audio:
+        txt = os.path.join(take_dir, "transcript.txt")
+        transcript_json = os.path.join(take_dir, "transcript.json")
+        transcribe = Task(take, "transcribe", tool_command(
+            "audio_transcribe.py", "--audio", take.audio, "--txt", temp_path(txt),
+            "--json", temp_path(transcript_json), "--model", args.model, *cache_args,
+            "--perf-json", os.path.join(log_dir, "transcribe.perf.json")),
+            [take.audio], [txt, transcript_json])
+        tasks.append(transcribe)
+
+        phonemes = os.path.join(take_dir, "phonemes.json")
+        if args.aligner == "builtin":
+            align_args = ["--transcript-json", transcript_json]
+            align_inputs = [transcript_json]
+            if args.dict:
+                align_args += ["--dict", args.dict]
+                align_inputs.append(args.dict)
+        else:
+            align_args = ["--audio", take.audio, "--transcript", txt]
+            align_inputs = [take.audio, txt]
+        tasks.append(Task(take, "align", tool_command(
+            "phoneme_align.py", "--aligner", args.aligner, *align_args,
+            "--output", temp_path(phonemes), *cache_args,
+            "--perf-json", os.path.join(log_dir, "align.perf.json")),
+            align_inputs, [phonemes], deps=[transcribe]))
+    return tasks
+
+
+def run_task(task, log_dir, timeout=None):
+    """Run a task's tool in a subprocess, logging its output; outputs are renamed into place on success."""
+    os.makedirs(log_dir, exist_ok=True)
+    for path in task.outputs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    log_path = os.path.join(log_dir, f"{task.stage}.log")
+    started = time.perf_counter()
+    try:
+        with open(log_path, "w", encoding="utf-8") as log:
+            log.write(" ".join(task.command) + "\n\n")
+            log.flush()
+            returncode = subprocess.run(task.command, stdout=log, stderr=subprocess.STDOUT,
+                                        stdin=subprocess.DEVNULL, timeout=timeout).returncode
+    except subprocess.TimeoutExpired:
+        returncode = None
+    task.seconds = time.perf_counter() - started
+    temps = [temp_path(p) for p in task.outputs]
+    # The tools report missing inputs on stdout and exit 0, so success also requires every output
+    if returncode != 0 or not all(os.path.exists(p) for p in temps):
+        for p in temps:
+            if os.path.exists(p) and not os.path.exists(p + CHECKPOINT_SUFFIX):
+                os.remove(p)
+        if returncode is None:
+            return False, f"timed out after {timeout:g}s (see {log_path})"
+        return False, f"exit code {returncode} (see {log_path})"
+    for temp, final in zip(temps, task.outputs):
+        os.replace(temp, final)
+    return True, ""
+
+
+def run_graph(tasks, output_dir, workers=2, stage_limits=None, timeout=None, force=False, perf=None):
+    """
+    Run tasks on a thread pool as soon as their dependencies finish, at most `workers` at a time and at most
+    `stage_limits[stage]` per stage (e.g. to keep a single Whisper model in memory). Up-to-date tasks are
+    skipped; tasks that depend on a failed task are marked blocked. Stage wall times and task outcomes are
+    recorded in `perf`; each tool also writes its own summary to <take>/logs/<stage>.perf.json.
+    """
+    stage_limits = stage_limits or {}
+    if perf is None:
+        perf = PerfRecorder("batch_pipeline")
+    running = {}
+    stage_counts = {}
+    lock = threading.Lock()
+
+    def log(task, text):
+        with lock:
+            print(f"[{task.label}] {text}", flush=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            progressed = False
+            for task in tasks:
+                if task.state != "pending":
+                    continue
+                if any(dep.state in ("failed", "blocked") for dep in task.deps):
+                    task.state = "blocked"
+                    perf.count("blocked")
+                    progressed = True
+                    log(task, "blocked by a failed dependency")
+                    continue
+                if not all(dep.state in ("done", "skipped") for dep in task.deps):
+                    continue
+                if not force and task.is_up_to_date():
+                    task.state = "skipped"
+                    perf.count("skipped")
+                    progressed = True
+                    log(task, "up to date")
+                    continue
+                limit = stage_limits.get(task.stage)
+                if len(running) >= workers or (limit and stage_counts.get(task.stage, 0) >= limit):
+                    continue
+                task.state = "running"
+                stage_counts[task.stage] = stage_counts.get(task.stage, 0) + 1
+                log(task, "started")
+                log_dir = os.path.join(output_dir, task.take.name, "logs")
+                running[pool.submit(run_task, task, log_dir, timeout)] = task
+
+            if not running:
+                if progressed:
+                    continue
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                stage_counts[task.stage] -= 1
+                try:
+                    ok, message = future.result()
+                except Exception as e:
+                    ok, message = False, str(e)
+                task.state = "done" if ok else "failed"
+                task.message = message
+                perf.add_time(task.stage, task.seconds)
+                perf.count(task.state)
+                log(task, f"finished in {task.seconds:.1f}s" if ok else f"FAILED: {message}")
+    return tasks
+
+
+def print_summary(tasks, elapsed):
+    counts = {}
+    for task in tasks:
+        counts[task.state] = counts.get(task.state, 0) + 1
+    print(f"\nPipeline finished in {elapsed:.1f}s: " +
+          ", ".join(f"{count} {state}" for state, count in sorted(counts.items())))
+    for task in tasks:
+        if task.state in ("failed", "blocked"):
+            print(f"  {task.label}: {task.state} {task.message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run pose extraction, transcription and phoneme alignment for a batch of takes.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", help="Directory of takes; files sharing a name (take01.mp4, take01.wav) form a take")
+    source.add_argument("--manifest", help="JSON manifest: a list of {\"name\", \"video\", \"audio\"} objects")
+    parser.add_argument("--output-dir", default="data", help="Outputs go to <output-dir>/<take name>/")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="Maximum number of stages running at once")
+    parser.add_argument("--transcribe-jobs", type=int, default=1,
+                        help="Maximum concurrent transcriptions (each loads its own Whisper model)")
+    parser.add_argument("--pose-format", choices=list(KEYPOINT_EXTENSIONS), default="ndjson",
+                        help="Keypoints output format")
+    parser.add_argument("--pose-workers", type=int, default=1,
+                        help="Worker processes per pose extraction (see pose_estimation.py --workers)")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--aligner", choices=["gentle", "builtin"], default="gentle",
+                        help="Phoneme aligner (see phoneme_align.py)")
+    parser.add_argument("--dict", default=None,
+                        help="CMUdict-format pronunciation dictionary for the builtin aligner "
+                             "(default: phoneme_align.py's own lookup)")
+    parser.add_argument("--timeout", type=float, default=None, help="Give up on a stage after this many seconds")
+    parser.add_argument("--force", action="store_true", help="Re-run stages even if their outputs are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="List the planned stages without running them")
+    add_cache_arguments(parser)
+    add_perf_arguments(parser)
+    args = parser.parse_args()
+
+    if args.input_dir:
+        if not os.path.isdir(args.input_dir):
+            print(f"Input directory not found: {args.input_dir}")
+            sys.exit(1)
+        takes = discover_takes(args.input_dir)
+    else:
+        if not os.path.exists(args.manifest):
+            print(f"Manifest not found: {args.manifest}")
+            sys.exit(1)
+        takes = load_manifest(args.manifest)
+
+    tasks = []
+    for take in takes:
+        tasks.extend(plan_take(take, args.output_dir, args))
+    print(f"{len(takes)} takes, {len(tasks)} stages")
+
+    if args.dry_run:
+        for task in tasks:
+            state = "up to date" if task.is_up_to_date() and not args.force else "will run"
+            print(f"  {task.label}: {state}")
+        return
+
+    perf = PerfRecorder("batch_pipeline")
+    perf.set_info(takes=len(takes), stages=len(tasks), workers=args.workers)
+    run_graph(tasks, args.output_dir, workers=args.workers, stage_limits={"transcribe": args.transcribe_jobs},
+              timeout=args.timeout, force=args.force, perf=perf)
+    print_summary(tasks, perf.elapsed())
+    if args.perf_json:
+        perf.write_json(args.perf_json)
+    if any(task.state in ("failed", "blocked") for task in tasks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,109 @@
+# capture.py
+# Low-latency camera capture: a dedicated thread keeps draining the camera so readers always get the newest frame.
+
+import collections
+import threading
+import time
+
+from lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+
+
+class LatestFrameCapture:
+    """
+    Grabs camera frames continuously on a dedicated thread into a small ring buffer, so frames never pile up
+    in the driver's queue while inference is busy. read() hands out the newest frame not yet read together
+    with its capture timestamp (time.time() right after the grab); frames overtaken before anyone read them
+    are dropped and counted instead of being processed late.
+
+    `on_frame(bgr_frame, timestamp, sequence)` is called on the capture thread for every frame, dropped or
+    not, e.g. to record the full frame rate; it must not block.
+    """
+
+    def __init__(self, source=0, buffer_size=2, perf=None, on_frame=None):
+        self.source = source
+        self.perf = perf
+        self.on_frame = on_frame
+        self.fps = 0.0
+        self.frames = collections.deque(maxlen=max(1, buffer_size))  # (frame, timestamp, sequence)
+        self.sequence = 0        # frames grabbed so far
+        self.last_read = -1      # sequence number of the last frame handed out
+        self.dropped = 0
+        self.error = None
+        self.running = False
+        self._cond = threading.Condition()
+        self._cap = None
+        self._thread = None
+
+    def open(self):
+        """Open the camera and start the capture thread; returns False if the camera cannot be opened."""
+        self._cap = cv2.VideoCapture(self.source)
+        # Keep at most one frame queued in the driver (not every backend honors this; the thread is what counts)
+        self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not self._cap.isOpened():
+            self._cap.release()
+            return False
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        try:
+            while self.running:
+                start = time.perf_counter()
+                # grab() blocks until the camera delivers the next frame, so it is timed apart from decoding
+                if not self._cap.grab():
+                    break
+                timestamp = time.time()
+                grabbed = time.perf_counter()
+                ok, frame = self._cap.retrieve()
+                if not ok:
+                    break
+                if self.perf is not None:
+                    self.perf.add_time("capture_wait", grabbed - start)
+                    self.perf.add_time("decode", time.perf_counter() - grabbed)
+                if self.on_frame is not None:
+                    self.on_frame(frame, timestamp, self.sequence)
+                with self._cond:
+                    self.frames.append((frame, timestamp, self.sequence))
+                    self.sequence += 1
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self.running = False
+                self._cond.notify_all()
+
+    def _has_new_frame(self):
+        return bool(self.frames) and self.frames[-1][2] > self.last_read
+
+    def read(self, timeout=None):
+        """
+        Return the newest (bgr_frame, timestamp, sequence) not yet read, waiting up to `timeout` seconds for one.
+        Returns None on timeout or once the camera has stopped.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_new_frame() or not self.running, timeout)
+            if not self._has_new_frame():
+                return None
+            frame, timestamp, sequence = self.frames[-1]
+            dropped = sequence - self.last_read - 1
+            self.last_read = sequence
+            self.dropped += dropped
+        if self.perf is not None and dropped:
+            self.perf.count("camera_frames_dropped", dropped)
+        return frame, timestamp, sequence
+
+    def release(self):
+        """Stop the capture thread and close the camera."""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
\ No newline at end of file
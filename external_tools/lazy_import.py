@@ -0,0 +1,59 @@
+# lazy_import.py
+# Deferred imports for heavy dependencies (cv2, mediapipe, whisper, websockets, ...).
+
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access, so tools can parse arguments
+    and the GUI can show its window before paying for heavy imports.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_module(name):
+    """Return a LazyModule for `name`."""
+    return LazyModule(name)
+
+
+def preload_in_background(names, on_done=None):
+    """
+    Import modules on a daemon thread so they are warm by the time they are needed.
+    `on_done(timings)` is called from that thread with a list of (module name, seconds, error or None).
+    """
+    def run():
+        timings = []
+        for name in names:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+                error = None
+            except Exception as e:
+                error = e
+            timings.append((name, time.perf_counter() - started, error))
+        if on_done is not None:
+            on_done(timings)
+
+    thread = threading.Thread(target=run, name='preload', daemon=True)
+    thread.start()
+    return thread
\ No newline at end of file
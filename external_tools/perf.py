@@ -0,0 +1,132 @@
+# perf.py
+# Lightweight per-stage timers and counters shared by the tools and the standalone GUI.
+
+import json
+import os
+import threading
+import time
+
+
+class PerfRecorder:
+    """
+    Thread-safe accumulator of per-stage busy time and event counters for one run.
+    Hot loops time themselves with time.perf_counter() and call add_time(); cheap enough to leave on always.
+    snapshot() gives a JSON-ready summary, write_json() stores it and format_report() renders it for the console.
+    """
+
+    def __init__(self, tool=None):
+        self.tool = tool
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.timers = {}    # name -> [total seconds, count, max seconds]
+        self.counters = {}
+        self.info = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, name, seconds, count=1):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [seconds, count, seconds]
+            else:
+                timer[0] += seconds
+                timer[1] += count
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def timer(self, name):
+        """Context manager timing one occurrence of `name`, for code outside hot loops."""
+        return _Timer(self, name)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_info(self, **info):
+        """Attach run parameters (input, model, workers...) to the summary."""
+        self.info.update(info)
+
+    def merge(self, snapshot):
+        """Fold in a snapshot() from another recorder, e.g. one returned by a worker process."""
+        with self._lock:
+            for name, stats in snapshot.get("timers", {}).items():
+                timer = self.timers.setdefault(name, [0.0, 0, 0.0])
+                timer[0] += stats["total_s"]
+                timer[1] += stats["count"]
+                timer[2] = max(timer[2], stats["max_ms"] / 1000.0)
+            for name, value in snapshot.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def snapshot(self):
+        with self._lock:
+            timers = {
+                name: {
+                    "total_s": round(total, 6),
+                    "count": count,
+                    "mean_ms": round(1000.0 * total / count, 3) if count else 0.0,
+                    "max_ms": round(1000.0 * longest, 3),
+                }
+                for name, (total, count, longest) in self.timers.items()
+            }
+            counters = dict(self.counters)
+        return {
+            "tool": self.tool,
+            "started_at": self.started_at,
+            "elapsed_s": round(self.elapsed(), 6),
+            "timers": timers,
+            "counters": counters,
+            "info": dict(self.info),
+        }
+
+    def write_json(self, path):
+        """Write the summary as JSON (atomically, so readers never see a partial file)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def format_report(self, items=None, item_name="frame", stages=None):
+        """
+        Human-readable summary: throughput over `items`, mean time per occurrence of each timer and the
+        busiest of `stages` (all timers by default) as the bottleneck.
+        """
+        snapshot = self.snapshot()
+        elapsed = snapshot["elapsed_s"]
+        timers = snapshot["timers"]
+        lines = []
+        if items is not None:
+            rate = items / elapsed if elapsed > 0 else 0.0
+            lines.append(f"Processed {items} {item_name}s in {elapsed:.2f}s ({rate:.1f} {item_name}s/s)")
+        for name, stats in timers.items():
+            lines.append(f"  {name:<14} {stats['mean_ms']:8.2f} ms/{item_name}  "
+                         f"({stats['total_s']:.2f}s busy, {stats['count']} calls)")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"  {name:<14} {value}")
+        candidates = [name for name in (stages or timers) if name in timers]
+        if candidates:
+            bottleneck = max(candidates, key=lambda name: timers[name]["total_s"])
+            lines.append(f"  bottleneck: {bottleneck}")
+        return "\n".join(lines)
+
+
+class _Timer:
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def add_perf_arguments(parser):
+    """Add the standard --perf-json option to a tool's argument parser."""
+    parser.add_argument("--perf-json", default=None,
+                        help="Write a machine-readable performance summary (timers and counters) to this JSON file")
\ No newline at end of file
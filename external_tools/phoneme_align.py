@@ -1,14 +1,50 @@
 # phoneme_align.py
-# Aligns phonemes to transcript/audio using Gentle.
+# Aligns phonemes to transcript/audio using Gentle, or in-process from Whisper word timestamps.
 
 import argparse
 import subprocess
 import json
 import os
+import re
+import time
+from perf import PerfRecorder, add_perf_arguments
+from result_cache import ResultCache, add_cache_arguments
+
+TOOL_VERSION = "1"
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Path to Gentle's align.py or Docker image (update as needed)
 GENTLE_ALIGN_SCRIPT = "gentle/align.py"  # Update this path if needed
 
+# Pronunciation dictionary in CMUdict format ("WORD  W ER1 D" per line), used by the built-in aligner.
+# Looked up next to this script; when it is not there, the copy shipped with the `cmudict` package is used.
+DEFAULT_PRONUNCIATION_DICT = os.environ.get("VEEWOY_PRONUNCIATION_DICT", os.path.join(TOOLS_DIR, "cmudict.dict"))
+
+# Timers and counters for this run (dictionary load, alignment, serialization); see --perf-json.
+_perf = PerfRecorder("phoneme_align")
+
+ARPABET_VOWELS = {
+    "aa", "ae", "ah", "ao", "aw", "ay", "eh", "er", "ey", "ih", "iy", "ow", "oy", "uh", "uw"
+}
+
+# Vowels get twice the share of a word's duration of consonants when distributing phones.
+VOWEL_WEIGHT = 2.0
+CONSONANT_WEIGHT = 1.0
+
+# Letter-to-phoneme fallback for words missing from the dictionary (longest match first).
+_G2P_RULES = [
+    ("tch", ["ch"]), ("igh", ["ay"]), ("ough", ["ao"]),
+    ("ch", ["ch"]), ("sh", ["sh"]), ("th", ["th"]), ("ph", ["f"]), ("wh", ["w"]), ("ng", ["ng"]),
+    ("ck", ["k"]), ("qu", ["k", "w"]), ("ee", ["iy"]), ("ea", ["iy"]), ("oo", ["uw"]), ("ou", ["aw"]),
+    ("ow", ["ow"]), ("ai", ["ey"]), ("ay", ["ey"]), ("oa", ["ow"]), ("oi", ["oy"]), ("oy", ["oy"]),
+    ("au", ["ao"]), ("aw", ["ao"]), ("er", ["er"]), ("ir", ["er"]), ("ur", ["er"]), ("ar", ["aa", "r"]),
+    ("a", ["ae"]), ("b", ["b"]), ("c", ["k"]), ("d", ["d"]), ("e", ["eh"]), ("f", ["f"]), ("g", ["g"]),
+    ("h", ["hh"]), ("i", ["ih"]), ("j", ["jh"]), ("k", ["k"]), ("l", ["l"]), ("m", ["m"]), ("n", ["n"]),
+    ("o", ["aa"]), ("p", ["p"]), ("q", ["k"]), ("r", ["r"]), ("s", ["s"]), ("t", ["t"]), ("u", ["ah"]),
+    ("v", ["v"]), ("w", ["w"]), ("x", ["k", "s"]), ("y", ["y"]), ("z", ["z"]),
+]
+
 
 def run_gentle(audio_path, transcript_path, output_json_path):
     """
@@ -21,27 +57,216 @@ def run_gentle(audio_path, transcript_path, output_json_path):
         transcript_path
     ]
     print(f"Running Gentle: {' '.join(cmd)}")
-    with open(output_json_path, "w", encoding="utf-8") as outfile:
+    with open(output_json_path, "w", encoding="utf-8") as outfile, _perf.timer("alignment"):
         subprocess.run(cmd, stdout=outfile, check=True)
     print(f"Alignment complete. Output: {output_json_path}")
 
 
+def load_pronunciation_dict(dict_path, words=None):
+    """
+    Load a CMUdict-style pronunciation dictionary into {word: [phones]}.
+    Stress markers are dropped, only the first pronunciation of each word is kept, ';;;' lines are comments
+    and anything after '#' on a line is a note.
+    With `words` (a set of lowercase words) only those entries are parsed, which skips nearly all of a
+    full dictionary when aligning a single clip.
+    """
+    pronunciations = {}
+    with open(dict_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.startswith(";;;"):
+                continue
+            if words is not None:
+                head = line.split(None, 1)
+                if not head:
+                    continue
+                headword = head[0].lower()
+                if headword.endswith(")"):
+                    headword = headword.rsplit("(", 1)[0]
+                if headword not in words:
+                    continue
+            parts = line.split("#", 1)[0].split()
+            if len(parts) < 2:
+                continue
+            word = re.sub(r"\(\d+\)$", "", parts[0].lower())
+            if word not in pronunciations:
+                pronunciations[word] = [re.sub(r"\d", "", p.lower()) for p in parts[1:]]
+    return pronunciations
+
+
+def resolve_pronunciation_dict(dict_path=None):
+    """
+    Return the pronunciation dictionary file to use, or None if there is none: `dict_path` when given,
+    else DEFAULT_PRONUNCIATION_DICT if it exists, else the CMUdict bundled with the `cmudict` package.
+    """
+    if dict_path:
+        return dict_path if os.path.exists(dict_path) else None
+    if os.path.exists(DEFAULT_PRONUNCIATION_DICT):
+        return DEFAULT_PRONUNCIATION_DICT
+    try:
+        import cmudict
+    except ImportError:
+        return None
+    packaged = os.path.join(os.path.dirname(cmudict.__file__), "data", "cmudict.dict")
+    return packaged if os.path.exists(packaged) else None
+
+
+def guess_phones(word):
+    """Rough letter-to-phoneme fallback for words missing from the pronunciation dictionary."""
+    letters = re.sub(r"[^a-z]", "", word)
+    if len(letters) > 2 and letters.endswith("e") and not letters.endswith("ee"):
+        letters = letters[:-1]  # silent final e
+    phones = []
+    i = 0
+    while i < len(letters):
+        for pattern, rule_phones in _G2P_RULES:
+            if letters.startswith(pattern, i):
+                if not phones or phones[-1] != rule_phones[0]:
+                    phones.extend(rule_phones)
+                i += len(pattern)
+                break
+        else:
+            i += 1
+    return phones
+
+
+def _normalize_word(text):
+    """Lowercase a transcript word and strip punctuation (apostrophes kept), as used for dictionary lookups."""
+    return re.sub(r"[^\w']", "", text.strip().lower())
+
+
+def distribute_phones(phones, start, end):
+    """Split a word's [start, end] span over its phones in Gentle's {"duration", "phone"} form."""
+    weights = [VOWEL_WEIGHT if p in ARPABET_VOWELS else CONSONANT_WEIGHT for p in phones]
+    total = sum(weights)
+    duration = max(0.0, end - start)
+    aligned = []
+    for i, (phone, weight) in enumerate(zip(phones, weights)):
+        if len(phones) == 1:
+            position = "S"
+        elif i == 0:
+            position = "B"
+        elif i == len(phones) - 1:
+            position = "E"
+        else:
+            position = "I"
+        aligned.append({"duration": round(duration * weight / total, 4), "phone": f"{phone}_{position}"})
+    return aligned
+
+
+def align_from_whisper(transcript_json_path, output_json_path, dict_path=None):
+    """
+    Build Gentle-style phoneme timings in-process from the word timestamps of a Whisper transcript JSON.
+    Each word's phones come from the pronunciation dictionary (or the letter-to-phoneme fallback)
+    and are spread across the word's time span, vowels getting a larger share.
+    """
+    with open(transcript_json_path, "r", encoding="utf-8") as f:
+        whisper_result = json.load(f)
+
+    segments = whisper_result.get("segments", [])
+    pronunciations = {}
+    resolved = resolve_pronunciation_dict(dict_path)
+    if resolved:
+        with _perf.timer("model_load"):
+            needed = {_normalize_word(w["word"]) for segment in segments for w in segment.get("words", [])}
+            pronunciations = load_pronunciation_dict(resolved, needed)
+    else:
+        print(f"Pronunciation dictionary not found ({dict_path or DEFAULT_PRONUNCIATION_DICT} or the cmudict "
+              "package), using letter-to-phoneme fallback.")
+
+    started = time.perf_counter()
+    transcript = whisper_result.get("text", "").strip()
+    words = []
+    cursor = 0
+    for segment in segments:
+        for w in segment.get("words", []):
+            text = w["word"].strip()
+            aligned_word = _normalize_word(text)
+            if not aligned_word:
+                continue
+            start_offset = transcript.find(text, cursor)
+            if start_offset < 0:
+                start_offset = cursor
+            end_offset = start_offset + len(text)
+            cursor = end_offset
+            phones = pronunciations.get(aligned_word) or guess_phones(aligned_word)
+            entry = {
+                "alignedWord": aligned_word,
+                "case": "success",
+                "end": w["end"],
+                "endOffset": end_offset,
+                "phones": distribute_phones(phones, w["start"], w["end"]) if phones else [],
+                "start": w["start"],
+                "startOffset": start_offset,
+                "word": text,
+            }
+            words.append(entry)
+    _perf.add_time("alignment", time.perf_counter() - started)
+    _perf.count("words", len(words))
+
+    with open(output_json_path, "w", encoding="utf-8") as outfile, _perf.timer("serialize"):
+        json.dump({"transcript": transcript, "words": words}, outfile, ensure_ascii=False, indent=2)
+    print(f"Alignment complete ({len(words)} words). Output: {output_json_path}")
+
+
 def main():
-    parser = argparse.ArgumentParser(description="Align phonemes to audio using Gentle.")
-    parser.add_argument("--audio", required=True, help="Path to audio file (wav)")
-    parser.add_argument("--transcript", required=True, help="Path to transcript file (txt)")
+    parser = argparse.ArgumentParser(description="Align phonemes to audio using Gentle or Whisper word timestamps.")
+    parser.add_argument("--aligner", choices=["gentle", "builtin"], default="gentle",
+                        help="gentle: run Gentle on audio + transcript; "
+                             "builtin: derive phones in-process from Whisper word timestamps")
+    parser.add_argument("--audio", help="Path to audio file (wav, gentle aligner only)")
+    parser.add_argument("--transcript", help="Path to transcript file (txt, gentle aligner only)")
+    parser.add_argument("--transcript-json", help="Whisper transcript JSON with word timestamps (builtin aligner)")
+    parser.add_argument("--dict", default=None,
+                        help=f"CMUdict-format pronunciation dictionary (builtin aligner, default: "
+                             f"{DEFAULT_PRONUNCIATION_DICT} if present, else the cmudict package's copy)")
     parser.add_argument("--output", default="phonemes.json", help="Output JSON file for phoneme timings")
+    add_cache_arguments(parser)
+    add_perf_arguments(parser)
     args = parser.parse_args()
 
-    if not os.path.exists(args.audio):
-        print(f"Audio file not found: {args.audio}")
-        return
-    if not os.path.exists(args.transcript):
-        print(f"Transcript file not found: {args.transcript}")
-        return
+    if args.aligner == "builtin":
+        if not args.transcript_json or not os.path.exists(args.transcript_json):
+            print(f"Transcript JSON not found: {args.transcript_json}")
+            return
+        dict_path = resolve_pronunciation_dict(args.dict)
+        inputs = [args.transcript_json] + ([dict_path] if dict_path else [])
+        params = {"aligner": "builtin"}
+        _perf.set_info(aligner="builtin", transcript_json=args.transcript_json)
+    else:
+        if not args.audio or not os.path.exists(args.audio):
+            print(f"Audio file not found: {args.audio}")
+            return
+        if not args.transcript or not os.path.exists(args.transcript):
+            print(f"Transcript file not found: {args.transcript}")
+            return
+        inputs = [args.audio, args.transcript]
+        params = {"aligner": "gentle", "gentle_script": GENTLE_ALIGN_SCRIPT}
+        _perf.set_info(aligner="gentle", audio=args.audio)
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir)
+        with _perf.timer("cache_lookup"):
+            cache_key = cache.make_key("phoneme_align", TOOL_VERSION, inputs, params)
+            hit = cache.fetch(cache_key, {"phonemes.json": args.output})
+        if hit:
+            _perf.count("cache_hits")
+            if args.perf_json:
+                _perf.write_json(args.perf_json)
+            print(f"Cache hit. Output: {args.output}")
+            return
+
+    if args.aligner == "builtin":
+        align_from_whisper(args.transcript_json, args.output, args.dict)
+    else:
+        run_gentle(args.audio, args.transcript, args.output)
 
-    run_gentle(args.audio, args.transcript, args.output)
+    if cache:
+        with _perf.timer("cache_store"):
+            cache.store(cache_key, {"phonemes.json": args.output})
+    if args.perf_json:
+        _perf.write_json(args.perf_json)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -2,46 +2,836 @@
 # Extracts keypoints from video or camera using MediaPipe.
 
 import argparse
-import cv2
-import mediapipe as mp
+import base64
 import json
+import math
+import multiprocessing
 import os
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from capture import LatestFrameCapture
+from lazy_import import lazy_module
+from perf import PerfRecorder, add_perf_arguments
+from result_cache import ResultCache, add_cache_arguments
+from smoothing import OneEuroSmoother, DEFAULT_MIN_CUTOFF, DEFAULT_BETA, DEFAULT_D_CUTOFF
 
+# Imported on first use so `--help` and argument errors do not wait for OpenCV/MediaPipe to load
+cv2 = lazy_module('cv2')
+mp = lazy_module('mediapipe')
 
-def extract_poses(input_path, output_path, use_camera=False):
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-    cap = cv2.VideoCapture(0 if use_camera else input_path)
+TOOL_VERSION = "1"
 
-    frame_idx = 0
-    all_keypoints = []
+NUM_LANDMARKS = 33
+NUM_CHANNELS = 4  # x, y, z, visibility
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image_rgb)
-        keypoints = []
-        if results.pose_landmarks:
-            for lm in results.pose_landmarks.landmark:
-                keypoints.append({
-                    'x': lm.x,
-                    'y': lm.y,
-                    'z': lm.z,
-                    'visibility': lm.visibility
-                })
-        all_keypoints.append({
+# Binary keypoints layout (little-endian), mirrored by blender_addon/utils.py:
+#   header: magic, version, header size, frame count, landmark count, channel count, fps
+#   data:   frames x landmarks x channels float32
+#   mask:   frames x uint8 flags (bit 0 = pose detected, bit 1 = interpolated rather than inferred)
+BINARY_MAGIC = b'VWKP'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sHHIHHf')
+BINARY_MASK_VALID = 1
+BINARY_MASK_INTERPOLATED = 2
+
+# Resume checkpoints are stored next to the output as <output><CHECKPOINT_SUFFIX>
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+
+class JsonKeypointWriter:
+    """
+    Collects all frames in memory and writes a single indented JSON array on close.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.frames = []
+
+    def write(self, frame_idx, keypoints, timestamp=None, interpolated=False):
+        record = {
             'frame': frame_idx,
             'keypoints': keypoints
-        })
+        }
+        if timestamp is not None:
+            record['timestamp'] = timestamp
+        if interpolated:
+            record['interpolated'] = True
+        self.frames.append(record)
+
+    def close(self):
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.frames, f, ensure_ascii=False, indent=2)
+
+
+class NdjsonKeypointWriter:
+    """
+    Writes one JSON object per line as soon as each frame is inferred.
+    The file is flushed every `flush_every` frames so it can be read while extraction is running.
+    `resume`, a checkpoint() state, cuts the file back to that point and appends from there.
+    """
+
+    def __init__(self, output_path, flush_every=30, resume=None):
+        self.output_path = output_path
+        self.flush_every = max(1, flush_every)
+        if resume:
+            os.truncate(output_path, resume['offset'])
+            self.file = open(output_path, 'a', encoding='utf-8')
+            self.frames = resume['frames']
+        else:
+            self.file = open(output_path, 'w', encoding='utf-8')
+            self.frames = 0
+        self.pending = 0
+
+    def write(self, frame_idx, keypoints, timestamp=None, interpolated=False):
+        record = {'frame': frame_idx, 'keypoints': keypoints}
+        if timestamp is not None:
+            record['timestamp'] = timestamp
+        if interpolated:
+            record['interpolated'] = True
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.frames += 1
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def checkpoint(self):
+        """Flush to disk and return the state needed to resume after the frames written so far."""
+        self.flush()
+        return {'frames': self.frames, 'offset': self.file.tell()}
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class BinaryKeypointWriter:
+    """
+    Writes keypoints as a contiguous frames x 33 x 4 float32 block followed by a per-frame validity mask.
+    Frames are streamed to disk as they arrive; the mask and final frame count are written on close.
+    Capture timestamps are not stored in this format. `resume`, a checkpoint() state, cuts the file back to
+    the end of its frames and restores their mask (which is not on disk until close).
+    """
+
+    def __init__(self, output_path, fps=0.0, flush_every=30, resume=None):
+        self.output_path = output_path
+        self.fps = float(fps or 0.0)
+        self.flush_every = max(1, flush_every)
+        if resume:
+            os.truncate(output_path, resume['offset'])
+            self.file = open(output_path, 'r+b')
+            self.file.seek(0, os.SEEK_END)
+            self.mask = bytearray(base64.b64decode(resume['mask']))
+        else:
+            self.file = open(output_path, 'wb')
+            self.file.write(self._header(0))
+            self.mask = bytearray()
+        self.empty_frame = np.zeros((NUM_LANDMARKS, NUM_CHANNELS), dtype='<f4').tobytes()
+
+    def _header(self, num_frames):
+        return BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, BINARY_HEADER.size,
+                                  num_frames, NUM_LANDMARKS, NUM_CHANNELS, self.fps)
+
+    def write(self, frame_idx, keypoints, timestamp=None, interpolated=False):
+        flags = BINARY_MASK_INTERPOLATED if interpolated else 0
+        if keypoints:
+            values = [(kp['x'], kp['y'], kp['z'], kp['visibility']) for kp in keypoints]
+            self.file.write(np.asarray(values, dtype='<f4').tobytes())
+            self.mask.append(flags | BINARY_MASK_VALID)
+        else:
+            self.file.write(self.empty_frame)
+            self.mask.append(flags)
+        if len(self.mask) % self.flush_every == 0:
+            self.file.flush()
+
+    @property
+    def frames(self):
+        return len(self.mask)
+
+    def checkpoint(self):
+        """Flush to disk and return the state needed to resume after the frames written so far."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {'frames': self.frames, 'offset': self.file.tell(),
+                'mask': base64.b64encode(self.mask).decode('ascii')}
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(bytes(self.mask))
+        self.file.seek(0)
+        self.file.write(self._header(len(self.mask)))
+        self.file.close()
+
+
+def guess_output_format(output_path):
+    """Pick an output format from the output file extension."""
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if ext in ('.vwkp', '.bin'):
+        return 'binary'
+    return 'json'
+
+
+def open_keypoint_writer(output_path, output_format=None, flush_every=30, fps=0.0, resume=None):
+    """
+    Create the keypoint writer for the requested output format.
+    `resume` (a writer checkpoint() state) continues a partial streamed file; JSON output cannot be resumed.
+    """
+    output_format = output_format or guess_output_format(output_path)
+    if output_format == 'ndjson':
+        return NdjsonKeypointWriter(output_path, flush_every=flush_every, resume=resume)
+    if output_format == 'binary':
+        return BinaryKeypointWriter(output_path, fps=fps, flush_every=flush_every, resume=resume)
+    if output_format == 'json':
+        if resume:
+            raise ValueError("JSON output is written on completion and cannot be resumed; use ndjson or binary")
+        return JsonKeypointWriter(output_path)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+class ExtractionCheckpoint:
+    """
+    Sidecar file (`<output>.checkpoint.json`) recording how far a streamed extraction got: the frames written,
+    the byte offset they end at and, for binary output, their mask. Saved every `every` frames (0 = only when
+    the writer stops) and removed once extraction completes, so an interrupted run can resume where it stopped.
+    `settings` are stored alongside so a run with different extraction options does not append to it.
+    """
+
+    def __init__(self, output_path, input_path, output_format, every=300, settings=None):
+        self.path = output_path + CHECKPOINT_SUFFIX
+        self.output_path = output_path
+        self.input_path = input_path
+        self.output_format = output_format
+        self.every = max(0, every)
+        self.settings = settings or {}
+
+    def _source(self):
+        return {
+            'input': os.path.abspath(self.input_path),
+            'input_size': os.path.getsize(self.input_path),
+            'format': self.output_format,
+            'settings': self.settings,
+        }
+
+    def save(self, writer):
+        state = writer.checkpoint()
+        state.update(self._source())
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Return the saved writer state if it belongs to this input, format, settings and output, else None."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        source = self._source()
+        if any(state.get(key) != value for key, value in source.items()):
+            return None
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) < state['offset']:
+            return None
+        return state
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def create_pose(min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    """Create a MediaPipe Pose model in video (tracking) mode."""
+    return mp.solutions.pose.Pose(static_image_mode=False,
+                                  min_detection_confidence=min_detection_confidence,
+                                  min_tracking_confidence=min_tracking_confidence)
+
+
+def array_to_keypoints(array):
+    """Convert an N x 4 (x, y, z, visibility) array to a list of keypoint dicts (empty for None)."""
+    if array is None:
+        return []
+    return [{'x': x, 'y': y, 'z': z, 'visibility': v} for x, y, z, v in array.tolist()]
+
+
+class RoiPoseEstimator:
+    """
+    Runs a Pose model on a crop around the performer instead of the whole frame. The crop is the bounding box
+    of the previous frame's visible landmarks, grown by `margin` (a fraction of the box's longer side) on each
+    side, and is optionally downscaled so its longer side is at most `target_size` pixels. Only the crop is
+    color-converted. Landmarks are mapped back to full-frame normalized coordinates, with z scaled like x
+    (by crop width / frame width). Whenever no pose is found, the next frame is processed whole again.
+    """
+
+    MIN_VISIBILITY = 0.5
+    MIN_VISIBLE_LANDMARKS = 4
+    MIN_CROP_PIXELS = 64
+
+    def __init__(self, pose, margin=0.25, target_size=None, perf=None):
+        self.pose = pose
+        self.margin = margin
+        self.target_size = target_size
+        self.perf = perf or PerfRecorder()
+        self.box = None  # (x0, y0, x1, y1) in pixels, None for the full frame
+
+    def process(self, frame_bgr):
+        """Infer one BGR frame; returns an N x 4 float32 array in full-frame coordinates, or None."""
+        start = time.perf_counter()
+        height, width = frame_bgr.shape[:2]
+        x0, y0, x1, y1 = self.box or (0, 0, width, height)
+        crop = frame_bgr[y0:y1, x0:x1]
+        crop_w, crop_h = x1 - x0, y1 - y0
+        if self.target_size and max(crop_w, crop_h) > self.target_size:
+            scale = self.target_size / max(crop_w, crop_h)
+            crop = cv2.resize(crop, (max(1, round(crop_w * scale)), max(1, round(crop_h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        image_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        converted = time.perf_counter()
+        results = self.pose.process(image_rgb)
+        self.perf.add_time('color_convert', converted - start)
+        self.perf.add_time('inference', time.perf_counter() - converted)
+        self.perf.count('roi_frames' if self.box else 'full_frames')
+
+        if not results.pose_landmarks:
+            self.box = None
+            return None
+        landmarks = np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+                             dtype=np.float32)
+        landmarks[:, 0] = (x0 + landmarks[:, 0] * crop_w) / width
+        landmarks[:, 1] = (y0 + landmarks[:, 1] * crop_h) / height
+        landmarks[:, 2] *= crop_w / width
+        self.box = self._next_box(landmarks, width, height)
+        return landmarks
+
+    def _next_box(self, landmarks, width, height):
+        visible = landmarks[landmarks[:, 3] >= self.MIN_VISIBILITY]
+        if len(visible) < self.MIN_VISIBLE_LANDMARKS:
+            return None
+        (x_min, y_min), (x_max, y_max) = visible[:, :2].min(axis=0), visible[:, :2].max(axis=0)
+        pad = self.margin * max((x_max - x_min) * width, (y_max - y_min) * height)
+        x0 = max(0, int(x_min * width - pad))
+        y0 = max(0, int(y_min * height - pad))
+        x1 = min(width, int(math.ceil(x_max * width + pad)))
+        y1 = min(height, int(math.ceil(y_max * height + pad)))
+        if x1 - x0 < self.MIN_CROP_PIXELS or y1 - y0 < self.MIN_CROP_PIXELS:
+            return None
+        return x0, y0, x1, y1
+
+
+def keypoints_to_array(keypoints):
+    """Convert a list of keypoint dicts to an N x 4 float32 array (None for an empty list)."""
+    if not keypoints:
+        return None
+    return np.array([(k['x'], k['y'], k['z'], k['visibility']) for k in keypoints], dtype=np.float32)
+
+
+class AdaptiveStride:
+    """
+    Picks how many frames to advance between inferred frames from how fast the landmarks move: near-still
+    footage is inferred every few frames, fast motion every frame. The stride is chosen so the fastest visible
+    landmark is expected to move at most `max_motion` (normalized image units) between inferred frames, which
+    bounds the error of interpolating the frames in between. It at most doubles per inferred frame and drops
+    back to 1 whenever the pose is lost.
+    """
+
+    MIN_VISIBILITY = 0.5
+
+    def __init__(self, max_stride=4, max_motion=0.01):
+        self.max_stride = max(1, max_stride)
+        self.max_motion = max_motion
+        self.stride = 1
+        self.previous = None  # (frame_idx, N x 4 array) of the last inferred frame with a pose
+
+    def update(self, frame_idx, array):
+        """Record an inferred frame (None when no pose was found) and return the stride to the next one."""
+        previous = self.previous
+        self.previous = (frame_idx, array) if array is not None else None
+        if array is None or previous is None or frame_idx <= previous[0]:
+            self.stride = 1
+            return self.stride
+        prev_idx, prev_array = previous
+        visible = (array[:, 3] >= self.MIN_VISIBILITY) & (prev_array[:, 3] >= self.MIN_VISIBILITY)
+        if not visible.any():
+            self.stride = 1
+            return self.stride
+        displacement = np.linalg.norm(array[visible, :2] - prev_array[visible, :2], axis=1)
+        speed = float(displacement.max()) / (frame_idx - prev_idx)
+        target = int(self.max_motion / speed) if speed > 0 else self.max_stride
+        self.stride = max(1, min(target, self.max_stride, self.stride * 2))
+        return self.stride
+
+
+def interpolate_keypoints(start, end, count):
+    """
+    `count` evenly spaced N x 4 arrays strictly between two inferred frames (linear in every channel).
+    All are None when either end has no pose.
+    """
+    if start is None or end is None:
+        return [None] * count
+    weights = np.arange(1, count + 1, dtype=np.float32)[:, None, None] / np.float32(count + 1)
+    return list(start + weights * (end - start))
+
+
+def smooth_keypoint_frames(smoother, frames):
+    """Smooth a run of consecutive frames (lists of keypoint dicts, empty when no pose) in one vectorized pass."""
+    valid = np.array([bool(keypoints) for keypoints in frames], dtype=bool)
+    array = np.zeros((len(frames), NUM_LANDMARKS, NUM_CHANNELS), dtype=np.float32)
+    for i, keypoints in enumerate(frames):
+        if keypoints:
+            array[i] = keypoints_to_array(keypoints)
+    smoothed = smoother.smooth(array, valid)
+    return [array_to_keypoints(smoothed[i]) if valid[i] else [] for i in range(len(frames))]
+
+
+def landmarks_to_keypoints(results):
+    """Convert MediaPipe pose results to a list of keypoint dicts (empty if no pose was found)."""
+    keypoints = []
+    if results.pose_landmarks:
+        for lm in results.pose_landmarks.landmark:
+            keypoints.append({
+                'x': lm.x,
+                'y': lm.y,
+                'z': lm.z,
+                'visibility': lm.visibility
+            })
+    return keypoints
+
+
+# Timers that make up the per-frame pipeline (candidates for the reported bottleneck)
+PIPELINE_STAGES = ('decode', 'color_convert', 'inference', 'smoothing', 'serialize')
+
+_END = object()
+
+
+def _put(q, item, stop_event):
+    """Put into a bounded queue, giving up if the pipeline is being torn down."""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop_event):
+    """Get from a queue, returning the end marker if the pipeline is being torn down."""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def _decode_stage(cap, frame_queue, perf, stop_event, errors, convert=True):
+    """Producer: read and (unless `convert` is False) color-convert frames into `frame_queue` as (frame, None)."""
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            perf.add_time('decode', time.perf_counter() - start)
+            if convert:
+                decoded = time.perf_counter()
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                perf.add_time('color_convert', time.perf_counter() - decoded)
+            if not _put(frame_queue, (frame, None), stop_event):
+                break
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+    finally:
+        _put(frame_queue, _END, stop_event)
+
+
+def _queued_frames(frame_queue, stop_event):
+    """Yield (frame, timestamp) items from the decoder until it finishes."""
+    while True:
+        item = _get(frame_queue, stop_event)
+        if item is _END:
+            return
+        yield item
+
+
+def _strided_frames(cap, perf, stop_event, stride, convert=True, total_frames=0, first_frame=0):
+    """
+    Yield (frame, None) from `cap` (set to `first_frame`) on the inference thread for adaptive-stride extraction.
+    Only every `stride.stride`-th frame (and the last one, when `total_frames` is known) is retrieved; frames in
+    between are only grabbed and yielded with a None frame. The next frame to retrieve is chosen after the
+    previous one has been inferred, so the output does not depend on how far decoding could run ahead.
+    """
+    frame_idx = first_frame
+    next_key = first_frame
+    while cap.isOpened() and not stop_event.is_set():
+        start = time.perf_counter()
+        if frame_idx < next_key and frame_idx != total_frames - 1:
+            if not cap.grab():
+                return
+            perf.add_time('decode', time.perf_counter() - start)
+            frame_idx += 1
+            yield None, None
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            return
+        perf.add_time('decode', time.perf_counter() - start)
+        if convert:
+            decoded = time.perf_counter()
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            perf.add_time('color_convert', time.perf_counter() - decoded)
+        yield frame, None
+        # Resumed only once the frame has been inferred, so the stride already reflects it
+        next_key = frame_idx + stride.stride
         frame_idx += 1
 
+
+def _camera_frames(capture, perf, stop_event, convert=True):
+    """
+    Yield (frame, capture timestamp) for the newest camera frame each time inference is ready for one.
+    Frames captured meanwhile are dropped by the LatestFrameCapture rather than queued, so there is no
+    decoder queue to go stale.
+    """
+    while not stop_event.is_set():
+        captured = capture.read(timeout=0.5)
+        if captured is None:
+            if not capture.running:
+                return
+            continue
+        frame, timestamp, _ = captured
+        if convert:
+            start = time.perf_counter()
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            perf.add_time('color_convert', time.perf_counter() - start)
+        yield frame, timestamp
+
+
+def _write_stage(writer, result_queue, perf, stop_event, errors, checkpoint=None):
+    """
+    Consumer: serialize inferred frames from `result_queue`. With an ExtractionCheckpoint, the progress is
+    saved every `checkpoint.every` frames and once more when the stage stops, even if extraction was aborted.
+    """
+    try:
+        while True:
+            item = _get(result_queue, stop_event)
+            if item is _END:
+                break
+            start = time.perf_counter()
+            writer.write(*item)
+            perf.add_time('serialize', time.perf_counter() - start)
+            if checkpoint is not None and checkpoint.every and writer.frames % checkpoint.every == 0:
+                with perf.timer('checkpoint'):
+                    checkpoint.save(writer)
+        if checkpoint is not None:
+            with perf.timer('checkpoint'):
+                checkpoint.save(writer)
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+
+
+def extract_poses(input_path, output_path, use_camera=False, output_format=None, flush_every=30,
+                  decode_queue=8, write_queue=64, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                  progress_callback=None, progress_interval=0.5, cancel_event=None, perf=None, smoothing=None,
+                  roi=None, stride=None, checkpoint_every=0, resume=False, warmup=15):
+    """
+    Extract poses with a bounded three-stage pipeline: a decoder thread, inference on the calling thread
+    and a writer thread. Queue depths bound memory; per-stage timings are recorded in `perf` (a PerfRecorder,
+    created if not given) and printed at the end.
+
+    `smoothing`, a dict of OneEuroSmoother parameters (min_cutoff, beta, d_cutoff), smooths each frame's
+    landmarks right after inference. `roi`, a dict of RoiPoseEstimator parameters (margin, target_size),
+    runs inference on a crop around the previous frame's pose; frames are then color-converted after cropping.
+    `stride`, a dict of AdaptiveStride parameters (max_stride, max_motion), skips inference on frames while the
+    pose moves slowly and writes linearly interpolated landmarks for them, flagged as interpolated (video only).
+    Frames are then read on the inference thread, so which frames are inferred depends only on the video.
+
+    The camera is read through a LatestFrameCapture, so inference always gets the newest frame; its capture
+    timestamp is written with the keypoints and drives the smoothing filter.
+
+    For streamed video output (ndjson/binary), `checkpoint_every` > 0 keeps an ExtractionCheckpoint next to the
+    output. With `resume`, a matching checkpoint is picked up: the output is cut back to it, the video is sought
+    `warmup` frames before the first missing frame to re-warm tracking (those results are discarded), and
+    extraction appends from there. The checkpoint is removed once extraction completes.
+
+    `progress_callback(frames_done, total_frames, elapsed_seconds)` is called at most every `progress_interval`
+    seconds (total_frames is 0 when unknown). Setting `cancel_event` stops extraction after the current frame;
+    frames already inferred are still written. Returns the number of frames written by this run.
+    """
+    if perf is None:
+        perf = PerfRecorder('pose_estimation')
+    with perf.timer('model_load'):
+        pose = create_pose(min_detection_confidence, min_tracking_confidence)
+    if use_camera:
+        cap = LatestFrameCapture(0, perf=perf)
+        if not cap.open():
+            print('Could not open camera.')
+        fps = cap.fps
+        total_frames = 0
+    else:
+        cap = cv2.VideoCapture(input_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        total_frames = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    output_format = output_format or guess_output_format(output_path)
+    checkpoint = None
+    resume_state = None
+    if (checkpoint_every or resume) and not use_camera and output_format != 'json':
+        settings = {
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence,
+            'smoothing': smoothing,
+            'roi': roi,
+            'stride': stride,
+        }
+        checkpoint = ExtractionCheckpoint(output_path, input_path, output_format, checkpoint_every, settings)
+        if resume:
+            resume_state = checkpoint.load()
+            if resume_state is None:
+                print('No matching checkpoint found; starting from the first frame.')
+    start_frame = resume_state['frames'] if resume_state else 0
+    first_frame = 0
+    if start_frame:
+        first_frame = max(0, start_frame - warmup)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+        print(f"Resuming at frame {start_frame} (re-warming tracking from frame {first_frame}).")
+    writer = open_keypoint_writer(output_path, output_format, flush_every, fps=fps, resume=resume_state)
+    smoother = OneEuroSmoother(fps, **smoothing) if smoothing is not None else None
+    roi_estimator = RoiPoseEstimator(pose, perf=perf, **roi) if roi is not None else None
+    adaptive_stride = AdaptiveStride(**stride) if stride is not None and not use_camera else None
+
+    result_queue = queue.Queue(maxsize=max(1, write_queue))
+    stop_event = threading.Event()
+    errors = []
+    decoder = None
+    if use_camera:
+        frames = _camera_frames(cap, perf, stop_event, roi is None)
+    elif adaptive_stride is not None:
+        frames = _strided_frames(cap, perf, stop_event, adaptive_stride, roi is None, total_frames, first_frame)
+    else:
+        frame_queue = queue.Queue(maxsize=max(1, decode_queue))
+        decoder = threading.Thread(target=_decode_stage,
+                                   args=(cap, frame_queue, perf, stop_event, errors, roi is None), daemon=True)
+        frames = _queued_frames(frame_queue, stop_event)
+    writer_thread = threading.Thread(target=_write_stage,
+                                     args=(writer, result_queue, perf, stop_event, errors, checkpoint), daemon=True)
+
+    def emit(item):
+        # Frames before the resume point only re-warm tracking and the filters; they are already in the output
+        return item[0] < start_frame or _put(result_queue, item, stop_event)
+
+    frame_idx = first_frame
+    skipped = 0           # frames passed over by the adaptive stride, waiting for the next inferred frame
+    last_inferred = None  # landmarks of the previous inferred frame, the start point for interpolation
+    started = time.perf_counter()
+    last_progress = started
+    cancelled = False
+    if decoder is not None:
+        decoder.start()
+    writer_thread.start()
+    try:
+        for frame, timestamp in frames:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            if frame is None:
+                skipped += 1
+                continue
+            start = time.perf_counter()
+            if timestamp is not None:
+                perf.add_time('capture_latency', time.time() - timestamp)
+            frame_idx += skipped
+            if roi_estimator is not None:
+                keypoints = array_to_keypoints(roi_estimator.process(frame))
+            else:
+                keypoints = landmarks_to_keypoints(pose.process(frame))
+                perf.add_time('inference', time.perf_counter() - start)
+            if frame_idx < start_frame:
+                perf.count('warmup_frames')
+            elif keypoints:
+                perf.count('frames_with_pose')
+            if adaptive_stride is not None:
+                adaptive_stride.update(frame_idx, keypoints_to_array(keypoints))
+            if smoother is not None:
+                smooth_start = time.perf_counter()
+                # Camera frames are smoothed on their capture times; video frames are 1/fps apart
+                if timestamp is not None:
+                    smooth_time = timestamp
+                else:
+                    smooth_time = frame_idx * smoother.dt if adaptive_stride is not None else None
+                smoothed = smoother.step(keypoints_to_array(keypoints), smooth_time)
+                keypoints = array_to_keypoints(smoothed)
+                perf.add_time('smoothing', time.perf_counter() - smooth_start)
+            if adaptive_stride is not None:
+                current = keypoints_to_array(keypoints)
+                for i, array in enumerate(interpolate_keypoints(last_inferred, current, skipped)):
+                    if not emit((frame_idx - skipped + i, array_to_keypoints(array), None, True)):
+                        break
+                perf.count('frames_interpolated', skipped)
+                last_inferred = current
+                skipped = 0
+            if not emit((frame_idx, keypoints, timestamp)):
+                break
+            frame_idx += 1
+            if progress_callback is not None and start - last_progress >= progress_interval:
+                last_progress = start
+                progress_callback(frame_idx, total_frames, start - started)
+        if skipped and not cancelled:
+            # The video ended between inferred frames (frame count unknown or off): hold the last pose
+            for i in range(skipped):
+                emit((frame_idx + i, array_to_keypoints(last_inferred), None, True))
+            perf.count('frames_interpolated', skipped)
+            frame_idx += skipped
+    except BaseException:
+        stop_event.set()
+        raise
+    finally:
+        # Let the writer drain what was already inferred, then tear everything down.
+        _put(result_queue, _END, stop_event)
+        writer_thread.join()
+        stop_event.set()
+        if decoder is not None:
+            decoder.join()
+        cap.release()
+        pose.close()
+        writer.close()
+
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - started
+    if progress_callback is not None:
+        progress_callback(frame_idx, total_frames, elapsed)
+    written = max(0, frame_idx - start_frame)
+    perf.count('frames', written)
+    print(perf.format_report(written, stages=PIPELINE_STAGES))
+    if cancelled:
+        print(f"Pose extraction cancelled after {frame_idx} frames. Partial output: {output_path}")
+        if checkpoint is not None:
+            print(f"Checkpoint saved to {checkpoint.path}; run again with --resume to continue.")
+    else:
+        if checkpoint is not None:
+            checkpoint.remove()
+        print(f"Pose extraction complete. Output: {output_path}")
+    return written
+
+
+def split_frame_ranges(total_frames, num_segments):
+    """Split [0, total_frames) into up to `num_segments` contiguous (start, stop) ranges of near-equal length."""
+    num_segments = max(1, min(num_segments, total_frames))
+    bounds = [total_frames * i // num_segments for i in range(num_segments + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(num_segments)]
+
+
+def _extract_segment(task):
+    """
+    Worker: run a fresh Pose model over frames [start, stop) of a video.
+    Decoding starts `warmup` frames early so tracking has converged by `start`; warm-up results are discarded.
+    A `stop` of None reads to the end of the file. Returns (start, frames, perf snapshot).
+    """
+    input_path, start, stop, warmup, min_detection_confidence, min_tracking_confidence, roi = task
+    perf = PerfRecorder('pose_estimation')
+    with perf.timer('model_load'):
+        pose = create_pose(min_detection_confidence, min_tracking_confidence)
+    roi_estimator = RoiPoseEstimator(pose, perf=perf, **roi) if roi is not None else None
+    cap = cv2.VideoCapture(input_path)
+    frame_idx = max(0, start - warmup)
+    if frame_idx > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+
+    frames = []
+    try:
+        while cap.isOpened() and (stop is None or frame_idx < stop):
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            t1 = time.perf_counter()
+            perf.add_time('decode', t1 - t0)
+            if roi_estimator is not None:
+                keypoints = array_to_keypoints(roi_estimator.process(frame))
+            else:
+                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                t2 = time.perf_counter()
+                keypoints = landmarks_to_keypoints(pose.process(image_rgb))
+                perf.add_time('color_convert', t2 - t1)
+                perf.add_time('inference', time.perf_counter() - t2)
+            if frame_idx >= start:
+                frames.append(keypoints)
+                if keypoints:
+                    perf.count('frames_with_pose')
+            else:
+                perf.count('warmup_frames')
+            frame_idx += 1
+    finally:
+        cap.release()
+        pose.close()
+    return start, frames, perf.snapshot()
+
+
+def extract_poses_parallel(input_path, output_path, workers=None, segments=None, warmup=15,
+                           output_format=None, flush_every=30,
+                           min_detection_confidence=0.5, min_tracking_confidence=0.5, perf=None, smoothing=None,
+                           roi=None):
+    """
+    Extract poses from a video file by splitting it into frame ranges processed by separate worker processes.
+    Each worker runs its own Pose model with a short warm-up overlap; results are stitched back in frame order.
+    By default the video is cut into 4 segments per worker to balance load and bound buffered results.
+    Worker timings are merged into `perf`, so busy times are summed over all processes. With `smoothing`,
+    each segment is smoothed in one vectorized pass as it arrives, continuing the filter across segments.
+    """
+    if perf is None:
+        perf = PerfRecorder('pose_estimation')
+    workers = workers or os.cpu_count() or 1
+    cap = cv2.VideoCapture(input_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
     cap.release()
-    pose.close()
+    if total_frames <= 0:
+        print("Frame count unavailable, falling back to serial extraction.")
+        extract_poses(input_path, output_path, output_format=output_format, flush_every=flush_every,
+                      min_detection_confidence=min_detection_confidence,
+                      min_tracking_confidence=min_tracking_confidence, perf=perf, smoothing=smoothing, roi=roi)
+        return
+
+    ranges = split_frame_ranges(total_frames, segments or workers * 4)
+    # The reported frame count can be short; let the last segment read to the end of the file.
+    settings = (min_detection_confidence, min_tracking_confidence, roi)
+    tasks = [(input_path, start, stop, warmup) + settings for start, stop in ranges]
+    tasks[-1] = (input_path, ranges[-1][0], None, warmup) + settings
+    print(f"Extracting {total_frames} frames in {len(tasks)} segments on {workers} workers...")
+
+    writer = open_keypoint_writer(output_path, output_format, flush_every, fps=fps)
+    smoother = OneEuroSmoother(fps, **smoothing) if smoothing is not None else None
+    written = 0
+    try:
+        with multiprocessing.Pool(processes=workers) as pool:
+            # imap yields segments in submission order, so frames are written in order as segments finish.
+            for start, frames, segment_perf in pool.imap(_extract_segment, tasks):
+                perf.merge(segment_perf)
+                if smoother is not None:
+                    smooth_start = time.perf_counter()
+                    frames = smooth_keypoint_frames(smoother, frames)
+                    perf.add_time('smoothing', time.perf_counter() - smooth_start, len(frames))
+                serialize_start = time.perf_counter()
+                for offset, keypoints in enumerate(frames):
+                    writer.write(start + offset, keypoints)
+                perf.add_time('serialize', time.perf_counter() - serialize_start, len(frames))
+                written += len(frames)
+    finally:
+        writer.close()
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_keypoints, f, ensure_ascii=False, indent=2)
+    perf.count('frames', written)
+    print(perf.format_report(written, stages=PIPELINE_STAGES))
     print(f"Pose extraction complete. Output: {output_path}")
 
 
@@ -50,14 +840,136 @@ def main():
     parser.add_argument('--input', help='Path to input video file (ignored if --camera is set)')
     parser.add_argument('--output', default='keypoints.json', help='Output JSON file for keypoints')
     parser.add_argument('--camera', action='store_true', help='Use camera input instead of video file')
+    parser.add_argument('--format', choices=['json', 'ndjson', 'binary'], default=None,
+                        help='Output format (default: guessed from --output extension; '
+                             '.ndjson/.jsonl streams one frame per line, .vwkp/.bin writes packed float32)')
+    parser.add_argument('--flush-every', type=int, default=30,
+                        help='Flush streamed output to disk every N frames (ndjson/binary only)')
+    parser.add_argument('--decode-queue', type=int, default=8,
+                        help='Max decoded frames buffered ahead of inference '
+                             '(video files without --adaptive-stride; the camera always hands over its newest frame)')
+    parser.add_argument('--write-queue', type=int, default=64,
+                        help='Max inferred frames buffered ahead of the writer')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Split the video into frame ranges processed by N worker processes (0 = one per CPU core)')
+    parser.add_argument('--segments', type=int, default=None,
+                        help='Number of frame ranges for parallel extraction (default: 4 per worker)')
+    parser.add_argument('--warmup-frames', type=int, default=15,
+                        help='Frames decoded before each segment, or before the resume point with --resume, '
+                             'so tracking converges')
+    parser.add_argument('--checkpoint-every', type=int, default=300,
+                        help='Save a resume checkpoint next to streamed (ndjson/binary) output every N frames '
+                             '(serial mode; 0 = off)')
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted extraction from the output's checkpoint instead of starting over")
+    parser.add_argument('--min-detection-confidence', type=float, default=0.5, help='MediaPipe Pose detection threshold')
+    parser.add_argument('--min-tracking-confidence', type=float, default=0.5, help='MediaPipe Pose tracking threshold')
+    parser.add_argument('--roi', action='store_true',
+                        help="Run inference on a crop around the previous frame's pose (full frame when tracking is lost)")
+    parser.add_argument('--roi-margin', type=float, default=0.25,
+                        help='Crop margin on each side, as a fraction of the pose bounding box size')
+    parser.add_argument('--roi-size', type=int, default=0,
+                        help='Downscale the inference image so its longer side is at most this many pixels (0 = off)')
+    parser.add_argument('--adaptive-stride', action='store_true',
+                        help='Skip inference on frames while the pose moves slowly and interpolate them instead '
+                             '(interpolated frames are flagged in the output; runs serially)')
+    parser.add_argument('--max-stride', type=int, default=4,
+                        help='Most frames to advance between inferred frames with --adaptive-stride')
+    parser.add_argument('--stride-motion', type=float, default=0.01,
+                        help='Largest expected landmark movement (normalized image units) between inferred frames; '
+                             'lower is more accurate, higher skips more frames')
+    parser.add_argument('--smooth', action='store_true', help='Apply One-Euro temporal smoothing to the landmarks')
+    parser.add_argument('--smooth-min-cutoff', type=float, default=DEFAULT_MIN_CUTOFF,
+                        help='Smoothing cutoff (Hz) for still poses; lower is smoother')
+    parser.add_argument('--smooth-beta', type=float, default=DEFAULT_BETA,
+                        help='How fast the cutoff rises with landmark speed; higher lags less on fast moves')
+    parser.add_argument('--smooth-d-cutoff', type=float, default=DEFAULT_D_CUTOFF,
+                        help='Cutoff (Hz) for the speed estimate used by the smoothing filter')
+    add_cache_arguments(parser)
+    add_perf_arguments(parser)
     args = parser.parse_args()
 
     if not args.camera and (not args.input or not os.path.exists(args.input)):
         print('Input video file not found. Use --camera for live input.')
         return
 
-    extract_poses(args.input, args.output, use_camera=args.camera)
+    roi = None
+    if args.roi:
+        roi = {'margin': args.roi_margin, 'target_size': args.roi_size or None}
+    smoothing = None
+    if args.smooth:
+        smoothing = {'min_cutoff': args.smooth_min_cutoff, 'beta': args.smooth_beta, 'd_cutoff': args.smooth_d_cutoff}
+    if args.resume:
+        if args.camera:
+            print('--resume only applies to video files.')
+            return
+        if (args.format or guess_output_format(args.output)) == 'json':
+            print('--resume needs streamed output (ndjson or binary); JSON is only written on completion.')
+            return
+        if args.workers != 1:
+            print('--resume runs serially; ignoring --workers.')
+            args.workers = 1
+    stride = None
+    if args.adaptive_stride:
+        stride = {'max_stride': args.max_stride, 'max_motion': args.stride_motion}
+        if args.workers != 1:
+            print('--adaptive-stride runs serially; ignoring --workers.')
+            args.workers = 1
+
+    perf = PerfRecorder('pose_estimation')
+    perf.set_info(input='camera' if args.camera else args.input, output=args.output, workers=args.workers)
+    cache = None
+    if not args.camera and not args.no_cache:
+        cache = ResultCache(args.cache_dir)
+        params = {
+            'format': args.format or guess_output_format(args.output),
+            'min_detection_confidence': args.min_detection_confidence,
+            'min_tracking_confidence': args.min_tracking_confidence,
+        }
+        if smoothing is not None:
+            params['smoothing'] = smoothing
+        if roi is not None:
+            params['roi'] = roi
+        if stride is not None:
+            params['stride'] = stride
+        if args.workers != 1:
+            # Segments restart tracking after a warm-up, so parallel output differs from a serial run
+            params['workers'] = args.workers or os.cpu_count() or 1
+            params['segments'] = args.segments
+            params['warmup_frames'] = args.warmup_frames
+        elif args.resume:
+            params['warmup_frames'] = args.warmup_frames
+        with perf.timer('cache_lookup'):
+            cache_key = cache.make_key('pose_estimation', TOOL_VERSION, [args.input], params)
+            hit = cache.fetch(cache_key, {'keypoints': args.output})
+        if hit:
+            perf.count('cache_hits')
+            if args.perf_json:
+                perf.write_json(args.perf_json)
+            print(f"Cache hit. Output: {args.output}")
+            return
+
+    confidences = {
+        'min_detection_confidence': args.min_detection_confidence,
+        'min_tracking_confidence': args.min_tracking_confidence,
+    }
+    if not args.camera and args.workers != 1:
+        extract_poses_parallel(args.input, args.output, workers=args.workers, segments=args.segments,
+                               warmup=args.warmup_frames, output_format=args.format, flush_every=args.flush_every,
+                               perf=perf, smoothing=smoothing, roi=roi, **confidences)
+    else:
+        extract_poses(args.input, args.output, use_camera=args.camera,
+                      output_format=args.format, flush_every=args.flush_every,
+                      decode_queue=args.decode_queue, write_queue=args.write_queue, perf=perf,
+                      smoothing=smoothing, roi=roi, stride=stride, checkpoint_every=args.checkpoint_every,
+                      resume=args.resume, warmup=args.warmup_frames, **confidences)
+
+    if cache:
+        with perf.timer('cache_store'):
+            cache.store(cache_key, {'keypoints': args.output})
+    if args.perf_json:
+        perf.write_json(args.perf_json)
 
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,137 @@
+# result_cache.py
+# Content-addressed cache for pose, transcript and alignment outputs.
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "VEEWOY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "veewoy")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("VEEWOY_CACHE_MAX_MB", "5120")) * 1024 * 1024
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Stores tool outputs under a key derived from the input file contents, the tool, its version and its parameters.
+    Each entry is a directory of named output files; the least recently used entries are evicted once the
+    cache grows past `max_bytes`. Several processes may share one cache (batch_pipeline runs tools side by side),
+    so entries can disappear at any time: a vanished entry is a miss, and a failed store only warns, since the
+    tool's own output is already complete.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, tool, tool_version, input_paths, params=None):
+        """Build a cache key from input file hashes, tool name/version and model parameters."""
+        description = {
+            "tool": tool,
+            "version": tool_version,
+            "inputs": [hash_file(p) for p in input_paths],
+            "params": params or {},
+        }
+        blob = json.dumps(description, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def fetch(self, key, outputs):
+        """
+        Copy cached files to their destinations. `outputs` maps output names to destination paths.
+        Returns True on a hit, False if the entry (or any of its files) is missing.
+        """
+        entry = self._entry_dir(key)
+        sources = {name: os.path.join(entry, name) for name in outputs}
+        if not all(os.path.isfile(src) for src in sources.values()):
+            return False
+        try:
+            for name, dest in outputs.items():
+                shutil.copyfile(sources[name], dest)
+            now = time.time()
+            os.utime(entry, (now, now))
+        except FileNotFoundError:
+            return False  # evicted by another process while copying
+        return True
+
+    def store(self, key, outputs):
+        """
+        Copy freshly produced output files into the cache, then evict old entries if over the size cap.
+        Returns False (after printing a warning) if the entry could not be stored.
+        """
+        staging = None
+        try:
+            staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+            for name, src in outputs.items():
+                shutil.copyfile(src, os.path.join(staging, name))
+            entry = self._entry_dir(key)
+            for attempt in range(3):
+                if os.path.isdir(entry):
+                    shutil.rmtree(entry, ignore_errors=True)
+                try:
+                    os.replace(staging, entry)
+                    break
+                except OSError:
+                    # Another process stored the same key in between; its entry holds the same results.
+                    # If that entry has already been evicted again, try once more.
+                    if os.path.isdir(entry):
+                        break
+                    if attempt == 2:
+                        raise
+            self.evict()
+        except OSError as e:
+            print(f"Warning: could not store results in the cache: {e}", file=sys.stderr)
+            return False
+        finally:
+            if staging is not None and os.path.isdir(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+        return True
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits within `max_bytes`."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(path, f))
+                    for f in os.listdir(path)
+                    if os.path.isfile(os.path.join(path, f))
+                )
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue  # removed by another process meanwhile
+            entries.append((mtime, size, path))
+            total += size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def add_cache_arguments(parser):
+    """Add the shared --no-cache / --cache-dir options to a tool's argument parser."""
+    parser.add_argument("--no-cache", action="store_true", help="Always recompute instead of using the result cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Result cache directory (default: {DEFAULT_CACHE_DIR}, or $VEEWOY_CACHE_DIR)")
\ No newline at end of file
@@ -0,0 +1,162 @@
+# smoothing.py
+# One-Euro temporal smoothing for pose landmark arrays (frames x landmarks x 4), offline or one frame at a time.
+
+import math
+import numpy as np
+
+# Only x, y, z are smoothed; visibility passes through unchanged.
+SMOOTHED_CHANNELS = 3
+
+DEFAULT_MIN_CUTOFF = 1.0  # Hz; lower = smoother when still
+DEFAULT_BETA = 4.0        # cutoff gain per unit/s of speed (normalized image units); higher = less lag when moving
+DEFAULT_D_CUTOFF = 1.0    # Hz; cutoff for the speed estimate
+
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a first-order low-pass filter with the given cutoff frequency (scalar or array)."""
+    r = 2.0 * math.pi * cutoff * dt
+    return r / (r + 1.0)
+
+
+def _linear_scan(a, b, y0):
+    """
+    Solve y[t] = a[t] * y[t - 1] + b[t] along axis 0 (y[-1] = y0) without a Python loop per frame.
+    `a` may have size-1 trailing axes (one coefficient per frame) to broadcast against `b`.
+    The sequence is cut into ~sqrt(T) blocks of ~sqrt(T) frames: all blocks are scanned together from a zero
+    state, then the true state entering each block is propagated across blocks and added back in.
+    """
+    total = len(b)
+    block = max(1, int(math.sqrt(total)))
+    blocks = -(-total // block)
+    pad = blocks * block - total
+    tail = b.shape[1:]
+
+    def block_major(values, fill):
+        # (blocks * block, ...) -> (block, blocks, ...) so each step of the scan touches contiguous memory
+        shape = values.shape[1:]
+        if pad:
+            values = np.concatenate([values, np.full((pad,) + shape, fill, values.dtype)])
+        return np.ascontiguousarray(values.reshape((blocks, block) + shape).swapaxes(0, 1))
+
+    a = block_major(a, 1.0)
+    h = block_major(b, 0.0)  # scanned in place: response of each block from a zero state
+    p = a.copy()             # running product of a within each block
+    for j in range(1, block):
+        h[j] += a[j] * h[j - 1]
+        p[j] *= p[j - 1]
+
+    carry = np.empty((blocks,) + tail, h.dtype)
+    state = y0
+    for k in range(blocks):
+        carry[k] = state
+        state = h[-1, k] + p[-1, k] * state
+    h += p * carry
+    return h.swapaxes(0, 1).reshape((blocks * block,) + tail)[:total]
+
+
+class OneEuroSmoother:
+    """
+    One-Euro filter over all landmarks at once: a low-pass filter whose cutoff rises with speed, so still
+    poses are steady and fast moves do not lag. Use step() per live frame, or smooth() for a block of frames;
+    both continue from the same state and give identical results.
+
+    The speed is estimated from the raw positions rather than the filtered ones, which makes each block a
+    linear recurrence that smooth() can solve without looping over frames in Python. The filter restarts at
+    the first detected pose after a gap.
+    """
+
+    def __init__(self, fps=30.0, min_cutoff=DEFAULT_MIN_CUTOFF, beta=DEFAULT_BETA, d_cutoff=DEFAULT_D_CUTOFF):
+        self.dt = 1.0 / (fps or 30.0)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.prev_raw = None
+        self.prev_smoothed = None
+        self.prev_speed = None
+        self.prev_time = None
+
+    def step(self, keypoints, timestamp=None):
+        """
+        Smooth one frame (N x 4 array, or None when no pose was found, which resets the filter).
+        `timestamp` in seconds gives the real frame interval; without it frames are 1/fps apart.
+        """
+        if keypoints is None:
+            self.reset()
+            return None
+        keypoints = np.asarray(keypoints, dtype=np.float32)
+        x = keypoints[:, :SMOOTHED_CHANNELS]
+        dt = self.dt
+        if timestamp is not None:
+            if self.prev_time is not None and timestamp > self.prev_time:
+                dt = timestamp - self.prev_time
+            self.prev_time = timestamp
+        if self.prev_raw is None or self.prev_raw.shape != x.shape:
+            speed = np.zeros_like(x)
+            smoothed = x.copy()
+        else:
+            a_d = _alpha(self.d_cutoff, dt)
+            speed = a_d * (x - self.prev_raw) / dt + (1.0 - a_d) * self.prev_speed
+            a = _alpha(self.min_cutoff + self.beta * np.abs(speed), dt)
+            smoothed = a * x + (1.0 - a) * self.prev_smoothed
+        self.prev_raw, self.prev_speed, self.prev_smoothed = x, speed, smoothed
+        out = keypoints.copy()
+        out[:, :SMOOTHED_CHANNELS] = smoothed
+        return out
+
+    def smooth(self, keypoints, valid=None):
+        """
+        Smooth a frames x landmarks x 4 block at the configured fps, continuing from the current state.
+        Frames where `valid` is False are returned unchanged and restart the filter.
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float32)
+        frames = len(keypoints)
+        if frames == 0:
+            return keypoints.copy()
+        valid = np.ones(frames, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+        x = np.ascontiguousarray(keypoints[..., :SMOOTHED_CHANNELS])
+        dt = self.dt
+
+        continuing = self.prev_raw is not None and self.prev_raw.shape == x.shape[1:]
+        prev_valid = np.concatenate([[continuing], valid[:-1]])
+        # First frame of each run of detections (or no pose at all): the filter starts over there
+        restart = np.flatnonzero(~(valid & prev_valid))
+
+        a_d = _alpha(self.d_cutoff, dt)
+        velocity = np.empty_like(x)
+        velocity[0] = x[0] - self.prev_raw if continuing else 0.0
+        np.subtract(x[1:], x[:-1], out=velocity[1:])
+        velocity *= np.float32(a_d / dt)
+        velocity[restart] = 0.0
+        decay = np.full(frames, 1.0 - a_d, dtype=np.float32)
+        decay[restart] = 0.0
+        speed = _linear_scan(decay[:, None, None], velocity,
+                             self.prev_speed if continuing else np.zeros_like(x[0]))
+
+        # alpha = r / (r + 1) with r = 2 pi dt (min_cutoff + beta |speed|), computed in place
+        alpha = np.abs(speed)
+        alpha *= np.float32(self.beta)
+        alpha += np.float32(self.min_cutoff)
+        alpha *= np.float32(2.0 * math.pi * dt)
+        alpha /= alpha + 1.0
+        alpha[restart] = 1.0
+        weighted = alpha * x
+        np.subtract(1.0, alpha, out=alpha)
+        smoothed = _linear_scan(alpha, weighted, self.prev_smoothed if continuing else np.zeros_like(x[0]))
+
+        if valid[-1]:
+            self.prev_raw, self.prev_speed, self.prev_smoothed = x[-1].copy(), speed[-1], smoothed[-1]
+            self.prev_time = None
+        else:
+            self.reset()
+        out = keypoints.copy()
+        out[valid, :, :SMOOTHED_CHANNELS] = smoothed[valid]
+        return out
+
+
+def smooth_keypoints(keypoints, valid=None, fps=30.0, min_cutoff=DEFAULT_MIN_CUTOFF, beta=DEFAULT_BETA,
+                     d_cutoff=DEFAULT_D_CUTOFF):
+    """Smooth a whole frames x landmarks x 4 keypoint array offline (see OneEuroSmoother)."""
+    return OneEuroSmoother(fps, min_cutoff, beta, d_cutoff).smooth(keypoints, valid)
\ No newline at end of file
@@ -0,0 +1,77 @@
+# viseme_track.py
+# Converts phoneme timings (phonemes.json) into a dense per-frame viseme track for Blender.
+
+import argparse
+import json
+import math
+import os
+import numpy as np
+
+# Mouth shapes (Preston Blair set); the index in this list is the value stored per frame.
+VISEMES = ["rest", "AI", "E", "O", "U", "MBP", "FV", "L", "WQ", "etc"]
+
+PHONE_TO_VISEME = {
+    "aa": "AI", "ae": "AI", "ah": "AI", "ay": "AI", "aw": "AI",
+    "eh": "E", "ey": "E", "ih": "E", "iy": "E", "er": "E", "y": "E",
+    "ao": "O", "ow": "O", "oy": "O",
+    "uh": "U", "uw": "U",
+    "m": "MBP", "b": "MBP", "p": "MBP",
+    "f": "FV", "v": "FV",
+    "l": "L",
+    "w": "WQ", "r": "WQ",
+    "sil": "rest", "sp": "rest", "oov": "rest",
+}
+
+# Precomputed phone -> viseme index table; any other phone maps to "etc".
+_VISEME_INDEX = {phone: VISEMES.index(viseme) for phone, viseme in PHONE_TO_VISEME.items()}
+_ETC_INDEX = VISEMES.index("etc")
+
+
+def phone_to_viseme_index(phone):
+    """Map a Gentle phone label such as 'ah_B' to a viseme index."""
+    return _VISEME_INDEX.get(phone.split("_", 1)[0].lower(), _ETC_INDEX)
+
+
+def build_viseme_track(phonemes, fps):
+    """
+    Sample Gentle-style phoneme timings into a uint8 array with one viseme index per frame.
+    Frames not covered by any phone are 'rest'.
+    """
+    words = [w for w in phonemes.get("words", []) if w.get("case") == "success" and "start" in w]
+    end_time = max((w["end"] for w in words), default=0.0)
+    track = np.zeros(int(math.ceil(end_time * fps)) + 1, dtype=np.uint8)
+    for word in words:
+        t = word["start"]
+        for phone in word.get("phones", []):
+            first = int(round(t * fps))
+            t += phone["duration"]
+            last = max(first + 1, int(round(t * fps)))
+            track[first:last] = phone_to_viseme_index(phone["phone"])
+    return track
+
+
+def save_viseme_track(output_path, track, fps):
+    """Store the track, its fps and the viseme names in a compact .npz file."""
+    np.savez(output_path, visemes=track, fps=np.float32(fps), names=np.array(VISEMES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert phoneme timings into a per-frame viseme track.")
+    parser.add_argument("--phonemes", required=True, help="Phoneme timings JSON (Gentle format)")
+    parser.add_argument("--fps", type=float, default=24.0, help="Scene frame rate to sample at")
+    parser.add_argument("--output", default="visemes.npz", help="Output viseme track (.npz)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.phonemes):
+        print(f"Phonemes file not found: {args.phonemes}")
+        return
+
+    with open(args.phonemes, "r", encoding="utf-8") as f:
+        phonemes = json.load(f)
+    track = build_viseme_track(phonemes, args.fps)
+    save_viseme_track(args.output, track, args.fps)
+    print(f"Viseme track ({len(track)} frames @ {args.fps:g} fps) saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
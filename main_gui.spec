@@ -3,10 +3,10 @@
 
 a = Analysis(
     ['standalone_gui\\main_gui.py'],
-    pathex=[],
+    pathex=['external_tools'],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['numpy', 'cv2', 'mediapipe', 'websockets', 'livelink_protocol', 'capture', 'pose_estimation', 'smoothing'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,68 @@
+# livelink_protocol.py
+# Wire format for the live link between the standalone GUI and the Blender add-on.
+#
+# After connecting, a client may send a text hello listing the formats it accepts, best first:
+#     {"type": "hello", "formats": ["i16", "f32", "json"]}
+# The server answers {"type": "hello", "format": "<chosen>"}. Clients that send no hello get JSON.
+#
+# Binary pose messages are a fixed little-endian header followed by a landmarks x 4 array
+# (x, y, z, visibility), either float32 ("f32") or int16 quantized by I16_SCALE ("i16").
+# The decoder lives in blender_addon/utils.py and must be kept in sync.
+
+import json
+import struct
+import numpy as np
+
+MAGIC = b'VWLL'
+VERSION = 1
+# magic, version, encoding, landmark count, sequence number, timestamp (s), frame id
+HEADER = struct.Struct('<4sBBHIdI')
+
+FORMAT_JSON = 'json'
+FORMAT_F32 = 'f32'
+FORMAT_I16 = 'i16'
+SUPPORTED_FORMATS = (FORMAT_I16, FORMAT_F32, FORMAT_JSON)
+ENCODING_IDS = {FORMAT_F32: 0, FORMAT_I16: 1}
+
+# int16 quantization step: values in [-4, 4) keep ~0.00012 precision.
+I16_SCALE = 8192.0
+
+
+def negotiate_format(hello):
+    """Pick the first format from a client hello that the server supports (JSON if none or no hello)."""
+    if not hello or hello.get('type') != 'hello':
+        return FORMAT_JSON
+    for fmt in hello.get('formats', []):
+        if fmt in SUPPORTED_FORMATS:
+            return fmt
+    return FORMAT_JSON
+
+
+def hello_reply(fmt):
+    return json.dumps({'type': 'hello', 'format': fmt})
+
+
+def encode_pose(keypoints, frame_id, seq, timestamp, fmt=FORMAT_JSON):
+    """
+    Encode one pose (N x 4 array-like of x, y, z, visibility) in the given wire format.
+    Returns bytes for the binary formats and str for JSON.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float32).reshape(-1, 4)
+    if fmt == FORMAT_JSON:
+        return json.dumps({
+            'type': 'pose',
+            'frame': frame_id,
+            'seq': seq,
+            'timestamp': timestamp,
+            'keypoints': [
+                {'x': float(x), 'y': float(y), 'z': float(z), 'visibility': float(v)}
+                for x, y, z, v in keypoints.tolist()
+            ],
+        })
+    header = HEADER.pack(MAGIC, VERSION, ENCODING_IDS[fmt], len(keypoints), seq & 0xFFFFFFFF, timestamp,
+                         frame_id & 0xFFFFFFFF)
+    if fmt == FORMAT_I16:
+        payload = np.clip(np.round(keypoints * I16_SCALE), -32768, 32767).astype('<i2')
+    else:
+        payload = keypoints.astype('<f4')
+    return header + payload.tobytes()
\ No newline at end of file
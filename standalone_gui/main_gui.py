@@ -1,16 +1,412 @@
+import time
+# Reference point for the startup timing report (time-to-first-window)
+STARTUP_STARTED = time.perf_counter()
 import sys
-import cv2
+import os
 from PyQt5.QtWidgets import (
     QApplication, QLabel, QPushButton, QVBoxLayout, QWidget, QFileDialog,
-    QTabWidget, QHBoxLayout, QLineEdit, QTextEdit, QSlider, QSizePolicy
+    QTabWidget, QHBoxLayout, QLineEdit, QTextEdit, QSlider, QSizePolicy, QCheckBox
 )
 from PyQt5.QtGui import QImage, QPixmap, QFontDatabase, QFont, QIcon
-from PyQt5.QtCore import QTimer, QThread, pyqtSignal, Qt
-import asyncio
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal, Qt
+import argparse
+import queue
 import threading
-import websockets
 import json
-import mediapipe as mp
+
+# The extraction engine lives in external_tools/ next to this folder (bundled via pathex in main_gui.spec)
+EXTERNAL_TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'external_tools')
+if os.path.isdir(EXTERNAL_TOOLS_DIR) and EXTERNAL_TOOLS_DIR not in sys.path:
+    sys.path.insert(0, EXTERNAL_TOOLS_DIR)
+from lazy_import import lazy_module, preload_in_background
+from perf import PerfRecorder
+
+# Heavy modules are imported on first use so the window can appear immediately; once it is shown they are
+# preloaded on a background thread (see MainWindow.start_preload). They are listed as hiddenimports in
+# main_gui.spec because PyInstaller cannot see through the lazy imports.
+asyncio = lazy_module('asyncio')
+capture = lazy_module('capture')
+cv2 = lazy_module('cv2')
+mp = lazy_module('mediapipe')
+np = lazy_module('numpy')
+websockets = lazy_module('websockets')
+livelink_protocol = lazy_module('livelink_protocol')
+pose_estimation = lazy_module('pose_estimation')
+smoothing = lazy_module('smoothing')
+# Import order for the background preload: numpy first since everything else builds on it
+PRELOAD_MODULES = ('numpy', 'cv2', 'mediapipe', 'capture', 'pose_estimation', 'smoothing', 'asyncio',
+                   'websockets', 'livelink_protocol')
+
+
+class StartupReport:
+    """Startup milestones in milliseconds since launch, for tracking time-to-first-window."""
+
+    def __init__(self):
+        self.marks = []
+
+    def mark(self, label):
+        self.marks.append((label, (time.perf_counter() - STARTUP_STARTED) * 1000.0))
+
+    def summary(self):
+        return "Startup: " + ", ".join(f"{label} at {ms:.0f} ms" for label, ms in self.marks)
+
+startup_report = StartupReport()
+startup_report.mark("imports done")
+
+# Timers and counters for capture, inference, preview and live link; shown by the performance overlay and
+# written with --perf-json when the window closes.
+gui_perf = PerfRecorder('standalone_gui')
+
+def landmarks_to_array(pose_landmarks):
+    """Convert MediaPipe pose landmarks to an N x 4 (x, y, z, visibility) float32 array."""
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark], dtype=np.float32)
+
+class PreviewRenderer:
+    """
+    Paints RGB frames into a QLabel, downscaling first: each frame is resized once to the label size with
+    cv2.resize into a reused buffer, then wrapped in a QImage without any further conversion or scaling.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.buffer = None
+
+    def render(self, rgb):
+        if rgb is None:
+            return
+        label_w, label_h = self.label.width(), self.label.height()
+        if label_w <= 0 or label_h <= 0:
+            return
+        h, w = rgb.shape[:2]
+        scale = min(label_w / w, label_h / h)
+        target_w, target_h = max(1, int(w * scale)), max(1, int(h * scale))
+        start = time.perf_counter()
+        if self.buffer is None or self.buffer.shape[:2] != (target_h, target_w):
+            self.buffer = np.empty((target_h, target_w, 3), dtype=np.uint8)
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        cv2.resize(rgb, (target_w, target_h), dst=self.buffer, interpolation=interpolation)
+        # QPixmap.fromImage copies the pixels, so the buffer can be reused for the next frame
+        qt_img = QImage(self.buffer.data, target_w, target_h, 3 * target_w, QImage.Format_RGB888)
+        self.label.setPixmap(QPixmap.fromImage(qt_img))
+        gui_perf.add_time('preview_render', time.perf_counter() - start)
+
+def streamed_keypoints_path(path):
+    """
+    Return `path` as a streamed (ndjson/binary) keypoints file, adding .ndjson when it has no extension,
+    or None for any other extension: plain JSON keypoints stay in memory until the file is closed.
+    """
+    if not os.path.splitext(path)[1]:
+        return path + '.ndjson'
+    if pose_estimation.guess_output_format(path) == 'json':
+        return None
+    return path
+
+class SessionRecorder:
+    """
+    Records a camera session as a compressed video plus keypoints with capture timestamps.
+    Every captured frame goes to the video (fed from the capture thread, independently of inference), so it
+    plays back in real time; keypoints are written for the inferred frames, numbered by their video frame.
+    Each output has its own writer thread fed by a bounded queue, so disk I/O never blocks capture or
+    inference; if a writer falls a full queue behind, frames are dropped and counted rather than buffered.
+    """
+
+    def __init__(self, keypoints_path, video_path, fps, frame_size, video_queue=60, keypoint_queue=1024):
+        self.keypoints_path = keypoints_path
+        self.video_path = video_path
+        self.dropped_video = 0
+        self.dropped_keypoints = 0
+        self.frames = 0
+        self.keypoint_frames = 0
+        self.first_sequence = None  # capture sequence number of video frame 0
+        self.video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+        # Sessions can run for hours, so keypoints are always streamed to disk rather than held for a JSON dump
+        keypoint_format = 'binary' if pose_estimation.guess_output_format(keypoints_path) == 'binary' else 'ndjson'
+        self.keypoint_writer = pose_estimation.open_keypoint_writer(keypoints_path, keypoint_format, fps=fps)
+        self.video_queue = queue.Queue(maxsize=video_queue)
+        self.keypoint_queue = queue.Queue(maxsize=keypoint_queue)
+        self.threads = [
+            threading.Thread(target=self._write_video, daemon=True),
+            threading.Thread(target=self._write_keypoints, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def add_video_frame(self, frame_bgr, sequence):
+        """Queue one captured frame for the video (never blocks). `sequence` is its capture sequence number."""
+        if self.first_sequence is None:
+            self.first_sequence = sequence
+        self.frames += 1
+        try:
+            self.video_queue.put_nowait(frame_bgr)
+        except queue.Full:
+            self.dropped_video += 1
+
+    def add_keypoints(self, keypoints, sequence, timestamp):
+        """Queue the pose of an inferred frame (never blocks). `keypoints` is an N x 4 array or None."""
+        if self.first_sequence is None or sequence < self.first_sequence:
+            return  # captured before the recording started
+        self.keypoint_frames += 1
+        try:
+            self.keypoint_queue.put_nowait((sequence - self.first_sequence, keypoints, timestamp))
+        except queue.Full:
+            self.dropped_keypoints += 1
+
+    def _write_video(self):
+        while True:
+            frame = self.video_queue.get()
+            if frame is None:
+                break
+            self.video_writer.write(frame)
+
+    def _write_keypoints(self):
+        while True:
+            item = self.keypoint_queue.get()
+            if item is None:
+                break
+            frame_idx, keypoints, timestamp = item
+            self.keypoint_writer.write(frame_idx, pose_estimation.array_to_keypoints(keypoints), timestamp=timestamp)
+
+    def close(self):
+        """Drain both queues, then finalize the video and keypoint files."""
+        self.video_queue.put(None)
+        self.keypoint_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.video_writer.release()
+        self.keypoint_writer.close()
+
+    def summary(self):
+        return (f"Recorded {self.frames} video frames to {self.video_path} and {self.keypoint_frames} inferred "
+                f"frames to {self.keypoints_path} "
+                f"(dropped {self.dropped_video} video / {self.dropped_keypoints} keypoint frames)")
+
+class CaptureWorker(QThread):
+    """
+    Reads frames from a camera or video file and runs MediaPipe pose tracking off the GUI thread.
+    Each frame is converted to RGB once; the same buffer feeds tracking and, with the overlay drawn, the preview.
+    The GUI is notified through `frame_ready` and fetches the newest frame with take_latest(); if it has not
+    painted the previous frame yet, the new one replaces it instead of queueing up behind it.
+    Cameras (integer sources) are drained by a LatestFrameCapture thread, so tracking always gets the newest
+    frame instead of one that sat in the driver's buffer; each frame keeps its capture timestamp.
+    """
+    frame_ready = pyqtSignal()
+    status_signal = pyqtSignal(str)
+    end_of_stream = pyqtSignal()
+
+    def __init__(self, source, frame_interval=0.0, paused=False, pose_callback=None):
+        super().__init__()
+        self.source = source
+        # Seconds between frames for file playback; 0 reads as fast as the source delivers (cameras).
+        self.frame_interval = frame_interval
+        self.paused = paused
+        # Called from this thread with (keypoints, frame_idx, capture timestamp) for every tracked frame
+        self.pose_callback = pose_callback
+        # Poses are tracked while either is set; the overlay is only drawn with tracking_enabled,
+        # stream_poses keeps pose_callback fed (e.g. for the live link) with the overlay off
+        self.tracking_enabled = False
+        self.stream_poses = False
+        self.running = False
+        self._lock = threading.Lock()
+        self._latest = None
+        self._pending_steps = 0
+        self.recorder = None
+        self._record_request = None
+
+    def take_latest(self):
+        """Return the newest (rgb_frame, keypoints, frame_idx) not yet taken, or None."""
+        with self._lock:
+            latest, self._latest = self._latest, None
+        return latest
+
+    def step(self):
+        """Read a single frame even while paused (e.g. to show the first frame of a video)."""
+        self._pending_steps += 1
+
+    def start_recording(self, keypoints_path, video_path):
+        """Begin recording on the next captured frame (the recorder needs the frame size and fps)."""
+        self._record_request = (keypoints_path, video_path)
+
+    def stop_recording(self):
+        self._record_request = False
+
+    def _close_recorder(self, wait=False):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return
+
+        def finish():
+            recorder.close()
+            self.status_signal.emit(recorder.summary())
+        if wait:
+            finish()
+        else:
+            # Draining the writers can take a moment; do it off the capture thread
+            threading.Thread(target=finish, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def _record_video_frame(self, frame, timestamp, sequence):
+        # Runs on the camera's capture thread for every frame, so the recording keeps the full frame rate
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.add_video_frame(frame, sequence)
+
+    def run(self):
+        self.running = True
+        live = isinstance(self.source, int)
+        if live:
+            cap = capture.LatestFrameCapture(self.source, perf=gui_perf, on_frame=self._record_video_frame)
+            opened = cap.open()
+        else:
+            cap = cv2.VideoCapture(self.source)
+            opened = cap.isOpened()
+        if not opened:
+            self.status_signal.emit(f"Failed to open capture source: {self.source}")
+            return
+        mp_pose = mp.solutions.pose
+        mp_drawing = mp.solutions.drawing_utils
+        # Overlay is drawn on the RGB frame, so colors are given in RGB order
+        landmark_spec = mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=2)
+        connection_spec = mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=2)
+        pose = None
+        frame_idx = 0
+        next_due = time.perf_counter()
+        try:
+            while self.running:
+                if self.paused and not self._pending_steps:
+                    self.msleep(10)
+                    next_due = time.perf_counter()
+                    continue
+                if self._pending_steps:
+                    self._pending_steps -= 1
+                if live:
+                    captured = cap.read(timeout=0.5)
+                    if captured is None and cap.running:
+                        continue
+                    ret = captured is not None
+                    if ret:
+                        frame, timestamp, sequence = captured
+                        gui_perf.add_time('capture_latency', time.time() - timestamp)
+                else:
+                    read_start = time.perf_counter()
+                    ret, frame = cap.read()
+                    timestamp = time.time()
+                    sequence = frame_idx
+                    gui_perf.add_time('decode', time.perf_counter() - read_start)
+                if not ret:
+                    self.end_of_stream.emit()
+                    break
+                if self._record_request is not None:
+                    request, self._record_request = self._record_request, None
+                    self._close_recorder()
+                    if request:
+                        fps = (cap.fps if live else cap.get(cv2.CAP_PROP_FPS)) or 30.0
+                        try:
+                            self.recorder = SessionRecorder(request[0], request[1], fps,
+                                                            (frame.shape[1], frame.shape[0]))
+                            self.status_signal.emit(f"Recording to {request[1]} and {request[0]}...")
+                        except Exception as e:
+                            self.status_signal.emit(f"Failed to start recording: {e}")
+                tracking = self.tracking_enabled or self.stream_poses
+                if tracking and pose is None:
+                    try:
+                        with gui_perf.timer('model_load'):
+                            pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5,
+                                                min_tracking_confidence=0.5)
+                    except Exception as e:
+                        self.status_signal.emit(f"Error initializing pose model: {e}")
+                        self.tracking_enabled = False
+                        self.stream_poses = False
+                elif not tracking and pose is not None:
+                    pose.close()
+                    pose = None
+                convert_start = time.perf_counter()
+                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                gui_perf.add_time('color_convert', time.perf_counter() - convert_start)
+                keypoints = None
+                if pose is not None:
+                    try:
+                        inference_start = time.perf_counter()
+                        results = pose.process(image_rgb)
+                        gui_perf.add_time('inference', time.perf_counter() - inference_start)
+                        if results and results.pose_landmarks:
+                            keypoints = landmarks_to_array(results.pose_landmarks)
+                            if self.pose_callback:
+                                self.pose_callback(keypoints, frame_idx, timestamp)
+                            if self.tracking_enabled:
+                                overlay_start = time.perf_counter()
+                                mp_drawing.draw_landmarks(image_rgb, results.pose_landmarks,
+                                                          mp_pose.POSE_CONNECTIONS, landmark_spec, connection_spec)
+                                gui_perf.add_time('overlay', time.perf_counter() - overlay_start)
+                    except Exception as e:
+                        self.status_signal.emit(f"Tracking error: {e}")
+                recorder = self.recorder
+                if recorder is not None:
+                    if not live:
+                        recorder.add_video_frame(frame, sequence)
+                    recorder.add_keypoints(keypoints, sequence, timestamp)
+                with self._lock:
+                    pending = self._latest is not None
+                    self._latest = (image_rgb, keypoints, frame_idx)
+                gui_perf.count('frames')
+                if pending:
+                    gui_perf.count('preview_frames_replaced')
+                else:
+                    self.frame_ready.emit()
+                frame_idx += 1
+                if self.frame_interval:
+                    next_due += self.frame_interval
+                    delay = next_due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        # Fell behind (slow inference): keep real-time pacing instead of bursting to catch up
+                        next_due = time.perf_counter()
+        finally:
+            self._close_recorder(wait=True)
+            cap.release()
+            if pose is not None:
+                pose.close()
+
+class ExtractionWorker(QThread):
+    """Runs external_tools' pose extraction on a video file in the background, reporting progress."""
+    progress_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool, str)
+
+    def __init__(self, video_path, output_path):
+        super().__init__()
+        self.video_path = video_path
+        self.output_path = output_path
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, frames_done, total_frames, elapsed):
+        fps = frames_done / elapsed if elapsed > 0 else 0.0
+        if total_frames and fps > 0:
+            eta = max(0.0, (total_frames - frames_done) / fps)
+            percent = 100.0 * frames_done / total_frames
+            self.progress_signal.emit(
+                f"{frames_done}/{total_frames} frames ({percent:.1f}%) - {fps:.1f} fps - ETA {eta:.0f}s")
+        else:
+            self.progress_signal.emit(f"{frames_done} frames - {fps:.1f} fps")
+
+    def run(self):
+        try:
+            # Long videos must not be held in memory, so the output is always a streamed format
+            output_format = 'binary' if pose_estimation.guess_output_format(self.output_path) == 'binary' else 'ndjson'
+            frames = pose_estimation.extract_poses(
+                self.video_path, self.output_path, output_format=output_format,
+                progress_callback=self.report_progress, cancel_event=self.cancel_event)
+        except Exception as e:
+            self.finished_signal.emit(False, f"Pose extraction failed: {e}")
+            return
+        if self.cancel_event.is_set():
+            self.finished_signal.emit(False, f"Pose extraction cancelled after {frames} frames. Partial output: {self.output_path}")
+        else:
+            self.finished_signal.emit(True, f"Pose extraction complete ({frames} frames). Output: {self.output_path}")
 
 class CameraTab(QWidget):
     def __init__(self, status_callback):
@@ -21,7 +417,8 @@ class CameraTab(QWidget):
         self.image_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         self.start_button = QPushButton("Start Camera")
         self.stop_button = QPushButton("Stop Camera")
-        self.extract_button = QPushButton("Extract Pose to JSON")
+        self.extract_button = QPushButton("Start Recording")
+        self.recording = False
         self.toggle_tracking_button = QPushButton("Toggle Tracking Overlay")
         self.tracking_enabled = False
         self.toggle_tracking_button.setCheckable(True)
@@ -45,97 +442,97 @@ class CameraTab(QWidget):
         layout.addLayout(out_row)
         layout.addWidget(self.extract_button)
         self.setLayout(layout)
-        self.cap = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        # Capture and pose tracking run in a CaptureWorker; this tab only paints its frames
+        self.worker = None
         self.last_frame = None
-        # MediaPipe pose
-        self.mp_pose = mp.solutions.pose
-        self.pose = None
-        self.mp_drawing = mp.solutions.drawing_utils
+        self.preview = PreviewRenderer(self.image_label)
+        # Called with (keypoints, frame_id, capture timestamp) for every tracked frame, e.g. to feed the live link
+        self.pose_callback = None
+        self.stream_poses = False
 
     def toggle_tracking(self):
         self.tracking_enabled = not self.tracking_enabled
         if self.tracking_enabled:
             self.toggle_tracking_button.setText("Tracking ON")
             self.status_callback("Tracking overlay enabled.")
-            if self.pose is None:
-                try:
-                    self.pose = self.mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-                except Exception as e:
-                    self.status_callback(f"Error initializing pose model: {e}")
-                    self.pose = None
         else:
             self.toggle_tracking_button.setText("Tracking OFF")
             self.status_callback("Tracking overlay disabled.")
-            if self.pose is not None:
-                try:
-                    self.pose.close()
-                except Exception:
-                    pass
-                self.pose = None
+        if self.worker is not None:
+            self.worker.tracking_enabled = self.tracking_enabled
+
+    def set_stream_poses(self, enabled):
+        """Track poses for pose_callback even while the overlay is off (on while the live link server runs)."""
+        self.stream_poses = enabled
+        if self.worker is not None:
+            self.worker.stream_poses = enabled
 
     def select_output(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save Keypoints JSON", "", "JSON Files (*.json)")
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Keypoints", "", "Streamed JSON Lines (*.ndjson);;Binary Keypoints (*.vwkp)")
         if path:
             self.output_line.setText(path)
 
     def start_camera(self):
-        self.cap = cv2.VideoCapture(0)
-        self.timer.start(30)
+        if self.worker is not None and self.worker.isRunning():
+            self.status_callback("Camera already running.")
+            return
+        self.worker = CaptureWorker(0, pose_callback=self.pose_callback)
+        self.worker.tracking_enabled = self.tracking_enabled
+        self.worker.stream_poses = self.stream_poses
+        self.worker.frame_ready.connect(self.update_frame)
+        self.worker.status_signal.connect(self.status_callback)
+        self.worker.start()
         self.status_callback("Camera started.")
 
     def stop_camera(self):
-        self.timer.stop()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-        if self.pose is not None:
-            self.pose.close()
-            self.pose = None
+        if self.recording:
+            self.extract_pose()
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.wait()
+            self.worker = None
         self.status_callback("Camera stopped.")
 
     def update_frame(self):
-        if self.cap:
-            ret, frame = self.cap.read()
-            if ret:
-                # Always process tracking on new frame if enabled
-                processed_frame = frame.copy()
-                try:
-                    if self.tracking_enabled and self.pose is not None:
-                        image_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                        results = self.pose.process(image_rgb)
-                        if results and results.pose_landmarks:
-                            self.mp_drawing.draw_landmarks(
-                                processed_frame, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
-                except Exception as e:
-                    self.status_callback(f"Tracking error: {e}")
-                self.last_frame = processed_frame
-                self._update_preview_pixmap()
+        latest = self.worker.take_latest() if self.worker is not None else None
+        if latest is not None:
+            self.last_frame = latest[0]
+            self._update_preview_pixmap()
 
     def extract_pose(self):
-        # Placeholder for pose extraction logic
+        """Toggle session recording: camera video plus per-frame keypoints with capture timestamps."""
+        if self.recording:
+            if self.worker is not None:
+                self.worker.stop_recording()
+            self.recording = False
+            self.extract_button.setText("Start Recording")
+            return
         out_path = self.output_line.text()
         if not out_path:
             self.status_callback("Please select an output file.")
             return
-        self.status_callback(f"Pose extraction (camera) would save to: {out_path}")
-        # TODO: Integrate MediaPipe extraction here
+        out_path = streamed_keypoints_path(out_path)
+        if out_path is None:
+            self.status_callback("Recordings stream keypoints to disk; choose a .ndjson or .vwkp output file.")
+            return
+        self.output_line.setText(out_path)
+        if self.worker is None or not self.worker.isRunning():
+            self.start_camera()
+        if not self.tracking_enabled:
+            self.toggle_tracking_button.setChecked(True)
+            self.toggle_tracking()
+        video_path = os.path.splitext(out_path)[0] + ".mp4"
+        self.worker.start_recording(out_path, video_path)
+        self.recording = True
+        self.extract_button.setText("Stop Recording")
 
     def resizeEvent(self, event):
         self._update_preview_pixmap()
         super().resizeEvent(event)
 
     def _update_preview_pixmap(self):
-        if self.last_frame is not None:
-            rgb = cv2.cvtColor(self.last_frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            bytes_per_line = ch * w
-            qt_img = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_img)
-            label_size = self.image_label.size()
-            scaled_pixmap = pixmap.scaled(label_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.image_label.setPixmap(scaled_pixmap)
+        self.preview.render(self.last_frame)
 
 class VideoTab(QWidget):
     def __init__(self, status_callback):
@@ -146,6 +543,9 @@ class VideoTab(QWidget):
         self.output_line = QLineEdit()
         self.output_browse = QPushButton("Save As...")
         self.extract_button = QPushButton("Extract Pose to JSON")
+        self.cancel_extract_button = QPushButton("Cancel Extraction")
+        self.cancel_extract_button.setEnabled(False)
+        self.progress_label = QLabel()
         self.preview_label = QLabel()
         self.preview_label.setScaledContents(False)
         self.preview_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
@@ -159,6 +559,7 @@ class VideoTab(QWidget):
         self.video_browse.clicked.connect(self.select_video)
         self.output_browse.clicked.connect(self.select_output)
         self.extract_button.clicked.connect(self.extract_pose)
+        self.cancel_extract_button.clicked.connect(self.cancel_extraction)
         self.play_button.clicked.connect(self.play_video)
         self.pause_button.clicked.connect(self.pause_video)
         layout = QVBoxLayout()
@@ -176,81 +577,97 @@ class VideoTab(QWidget):
         btn_row.addWidget(self.pause_button)
         btn_row.addWidget(self.toggle_tracking_button)
         layout.addLayout(btn_row)
-        layout.addWidget(self.extract_button)
+        extract_row = QHBoxLayout()
+        extract_row.addWidget(self.extract_button)
+        extract_row.addWidget(self.cancel_extract_button)
+        layout.addLayout(extract_row)
+        layout.addWidget(self.progress_label)
         self.setLayout(layout)
-        self.cap = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.extraction_worker = None
+        # Decoding and pose tracking run in a CaptureWorker; this tab only paints its frames
+        self.worker = None
         self.current_frame = None
-        self.mp_pose = mp.solutions.pose
-        self.pose = None
-        self.mp_drawing = mp.solutions.drawing_utils
+        self.preview = PreviewRenderer(self.preview_label)
         self.frame_pos = 0
         self.total_frames = 0
         self.fps = 30
         self.video_loaded = False
+        # Called with (keypoints, frame_id, capture timestamp) for every tracked frame, e.g. to feed the live link
+        self.pose_callback = None
+        self.stream_poses = False
 
     def toggle_tracking(self):
         self.tracking_enabled = not self.tracking_enabled
         if self.tracking_enabled:
             self.toggle_tracking_button.setText("Tracking ON")
             self.status_callback("Tracking overlay enabled.")
-            if self.pose is None:
-                self.pose = self.mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
         else:
             self.toggle_tracking_button.setText("Tracking OFF")
             self.status_callback("Tracking overlay disabled.")
-            if self.pose is not None:
-                self.pose.close()
-                self.pose = None
+        if self.worker is not None:
+            self.worker.tracking_enabled = self.tracking_enabled
+
+    def set_stream_poses(self, enabled):
+        """Track poses for pose_callback even while the overlay is off (on while the live link server runs)."""
+        self.stream_poses = enabled
+        if self.worker is not None:
+            self.worker.stream_poses = enabled
 
     def select_video(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select Video File", "", "Video Files (*.mp4 *.avi *.mov)")
         if path:
             self.video_line.setText(path)
-            self.cap = cv2.VideoCapture(path)
-            if self.cap.isOpened():
-                self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+            self.stop_worker()
+            cap = cv2.VideoCapture(path)
+            if cap.isOpened():
+                self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                self.fps = cap.get(cv2.CAP_PROP_FPS) or 30
+                cap.release()
                 self.frame_pos = 0
                 self.video_loaded = True
                 self.status_callback(f"Loaded video: {path} ({self.total_frames} frames @ {self.fps:.2f} fps)")
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                self.update_frame()
+                self.worker = CaptureWorker(path, frame_interval=1.0 / self.fps, paused=True,
+                                            pose_callback=self.pose_callback)
+                self.worker.tracking_enabled = self.tracking_enabled
+                self.worker.stream_poses = self.stream_poses
+                self.worker.frame_ready.connect(self.update_frame)
+                self.worker.status_signal.connect(self.status_callback)
+                self.worker.end_of_stream.connect(lambda: self.status_callback("End of video."))
+                # Show the first frame while paused
+                self.worker.step()
+                self.worker.start()
             else:
                 self.status_callback("Failed to load video.")
                 self.video_loaded = False
 
+    def stop_worker(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.wait()
+            self.worker = None
+
     def play_video(self):
-        if self.cap and self.video_loaded:
-            self.timer.start(int(1000 / self.fps))
+        if self.worker is not None and self.video_loaded:
+            self.worker.paused = False
             self.status_callback("Playing video.")
 
     def pause_video(self):
-        self.timer.stop()
+        if self.worker is not None:
+            self.worker.paused = True
         self.status_callback("Paused video.")
 
     def update_frame(self):
-        if self.cap and self.video_loaded:
-            ret, frame = self.cap.read()
-            if not ret:
-                self.timer.stop()
-                self.status_callback("End of video.")
-                return
-            self.frame_pos += 1
-            # Always process tracking on new frame if enabled
-            processed_frame = frame.copy()
-            if self.tracking_enabled and self.pose is not None:
-                image_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                results = self.pose.process(image_rgb)
-                if results.pose_landmarks:
-                    self.mp_drawing.draw_landmarks(
-                        processed_frame, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
-            self.current_frame = processed_frame
+        latest = self.worker.take_latest() if self.worker is not None else None
+        if latest is not None:
+            frame, _, frame_idx = latest
+            self.frame_pos = frame_idx + 1
+            self.current_frame = frame
             self._update_preview_pixmap()
 
     def select_output(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save Keypoints JSON", "", "JSON Files (*.json)")
+        # Only streamed formats: they are written frame by frame instead of held in memory until the end
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Keypoints", "", "Streamed JSON Lines (*.ndjson);;Binary Keypoints (*.vwkp)")
         if path:
             self.output_line.setText(path)
 
@@ -260,23 +677,39 @@ class VideoTab(QWidget):
         if not video_path or not out_path:
             self.status_callback("Please select both video and output file.")
             return
-        self.status_callback(f"Pose extraction (video) would run on: {video_path}, output: {out_path}")
-        # TODO: Integrate MediaPipe extraction here
+        if self.extraction_worker is not None and self.extraction_worker.isRunning():
+            self.status_callback("Pose extraction already running.")
+            return
+        out_path = streamed_keypoints_path(out_path)
+        if out_path is None:
+            self.status_callback("Extraction streams keypoints to disk; choose a .ndjson or .vwkp output file.")
+            return
+        self.output_line.setText(out_path)
+        self.extraction_worker = ExtractionWorker(video_path, out_path)
+        self.extraction_worker.progress_signal.connect(self.progress_label.setText)
+        self.extraction_worker.finished_signal.connect(self.extraction_finished)
+        self.extract_button.setEnabled(False)
+        self.cancel_extract_button.setEnabled(True)
+        self.progress_label.setText("Starting extraction...")
+        self.status_callback(f"Extracting poses from {video_path} to {out_path}...")
+        self.extraction_worker.start()
+
+    def cancel_extraction(self):
+        if self.extraction_worker is not None:
+            self.extraction_worker.cancel()
+            self.status_callback("Cancelling pose extraction...")
+
+    def extraction_finished(self, success, message):
+        self.extract_button.setEnabled(True)
+        self.cancel_extract_button.setEnabled(False)
+        self.status_callback(message)
 
     def resizeEvent(self, event):
         self._update_preview_pixmap()
         super().resizeEvent(event)
 
     def _update_preview_pixmap(self):
-        if self.current_frame is not None:
-            rgb = cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            bytes_per_line = ch * w
-            qt_img = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_img)
-            label_size = self.preview_label.size()
-            scaled_pixmap = pixmap.scaled(label_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.preview_label.setPixmap(scaled_pixmap)
+        self.preview.render(self.current_frame)
 
 class AudioTab(QWidget):
     def __init__(self, status_callback):
@@ -323,6 +756,9 @@ class AudioTab(QWidget):
 
 class LiveLinkServerThread(QThread):
     status_signal = pyqtSignal(str)
+    HELLO_TIMEOUT = 0.5
+    # Messages buffered per client; when a slow client falls behind, its oldest messages are dropped.
+    CLIENT_BUFFER = 4
 
     def __init__(self, host='localhost', port=8765):
         super().__init__()
@@ -331,20 +767,80 @@ class LiveLinkServerThread(QThread):
         self.running = False
         self.loop = None
         self.server = None
+        self.clients = {}
+        self.seq = 0
 
-    async def handler(self, websocket, path):
+    async def negotiate_format(self, websocket):
+        """Wait briefly for a client hello and pick the wire format; clients without a hello get JSON."""
+        try:
+            start = time.perf_counter()
+            hello = json.loads(await asyncio.wait_for(websocket.recv(), timeout=self.HELLO_TIMEOUT))
+            gui_perf.add_time('socket_recv', time.perf_counter() - start)
+        except (asyncio.TimeoutError, ValueError, TypeError):
+            return livelink_protocol.FORMAT_JSON
+        fmt = livelink_protocol.negotiate_format(hello)
+        await websocket.send(livelink_protocol.hello_reply(fmt))
+        return fmt
+
+    async def handler(self, websocket, path=None):
         self.status_signal.emit(f"Client connected: {websocket.remote_address}")
+        send_queue = None
         try:
+            fmt = await self.negotiate_format(websocket)
+            self.status_signal.emit(f"Client {websocket.remote_address} using '{fmt}' format")
+            send_queue = asyncio.Queue(maxsize=self.CLIENT_BUFFER)
+            self.clients[websocket] = (fmt, send_queue)
             while self.running:
-                # Send dummy pose/phoneme data as JSON
-                data = {"type": "pose", "frame": 0, "keypoints": [{"x": 0.5, "y": 0.5}]}
-                await websocket.send(json.dumps(data))
-                await asyncio.sleep(0.1)
+                message = await send_queue.get()
+                if message is None:
+                    break
+                start = time.perf_counter()
+                await websocket.send(message)
+                gui_perf.add_time('socket_send', time.perf_counter() - start)
+                gui_perf.count('livelink_messages_sent')
+        except websockets.ConnectionClosed:
+            self.status_signal.emit(f"Client disconnected: {websocket.remote_address}")
         except Exception as e:
             self.status_signal.emit(f"WebSocket error: {e}")
+        finally:
+            self.clients.pop(websocket, None)
+
+    def publish(self, keypoints, frame_id, timestamp=None):
+        """
+        Thread-safe: queue one pose (N x 4 array) for every connected client. Never blocks the caller.
+        `timestamp` is the frame's capture time (time.time()); the send time is used when it is not known.
+        """
+        if self.running and self.loop is not None and self.clients:
+            if timestamp is None:
+                timestamp = time.time()
+            try:
+                self.loop.call_soon_threadsafe(self._broadcast, keypoints, frame_id, timestamp)
+            except RuntimeError:
+                pass  # the server stopped and closed its loop after the check above
+
+    def _broadcast(self, keypoints, frame_id, timestamp):
+        """Runs on the server loop: encode once per wire format in use and fan out to per-client buffers."""
+        self.seq += 1
+        encoded = {}
+        for fmt, send_queue in list(self.clients.values()):
+            if fmt not in encoded:
+                start = time.perf_counter()
+                encoded[fmt] = livelink_protocol.encode_pose(keypoints, frame_id, self.seq, timestamp, fmt)
+                gui_perf.add_time('livelink_encode', time.perf_counter() - start)
+            if send_queue.full():
+                send_queue.get_nowait()
+                gui_perf.count('livelink_messages_dropped')
+            send_queue.put_nowait(encoded[fmt])
+
+    def _shutdown(self):
+        for _, send_queue in list(self.clients.values()):
+            if send_queue.full():
+                send_queue.get_nowait()
+            send_queue.put_nowait(None)
+        self.server.close()
 
     async def start_server(self):
-        self.server = await websockets.serve(self.handler, self.host, self.port)
+        self.server = await websockets.serve(self.handler, self.host, self.port, close_timeout=1)
         self.status_signal.emit(f"WebSocket server started at ws://{self.host}:{self.port}")
         await self.server.wait_closed()
 
@@ -362,22 +858,73 @@ class LiveLinkServerThread(QThread):
     def stop(self):
         self.running = False
         if self.server:
-            self.loop.call_soon_threadsafe(self.server.close)
+            self.loop.call_soon_threadsafe(self._shutdown)
         self.status_signal.emit("WebSocket server stopped.")
 
 class LiveLinkTab(QWidget):
+    # Restart the smoothing filter after this long without a pose (seconds)
+    SMOOTHING_RESET_GAP = 0.5
+
     def __init__(self, status_callback):
         super().__init__()
         self.status_callback = status_callback
         self.server_thread = None
+        # Called with True when the server starts and False when it stops, so the capture tabs keep
+        # tracking poses for it even with their overlay off
+        self.streaming_callback = None
         self.start_button = QPushButton("Start Live Link Server")
         self.stop_button = QPushButton("Stop Live Link Server")
+        self.smooth_checkbox = QCheckBox("Smooth streamed poses (One-Euro filter)")
         self.start_button.clicked.connect(self.start_server)
         self.stop_button.clicked.connect(self.stop_server)
+        self.smooth_checkbox.toggled.connect(self.set_smoothing)
         layout = QVBoxLayout()
         layout.addWidget(self.start_button)
         layout.addWidget(self.stop_button)
+        layout.addWidget(self.smooth_checkbox)
         self.setLayout(layout)
+        # publish() runs on capture threads, so the filter state is guarded by a lock
+        self.smoothing_enabled = False
+        self._smoother = None
+        self._smooth_lock = threading.Lock()
+        self._last_frame_id = None
+        self._last_pose_time = 0.0
+
+    def set_smoothing(self, enabled):
+        with self._smooth_lock:
+            self.smoothing_enabled = enabled
+            self._smoother = None
+
+    def publish(self, keypoints, frame_id, timestamp=None):
+        """
+        Single entry point for tracked poses from the camera/video tabs. `timestamp` is the frame's capture
+        time; it is sent on the wire and spaces the smoothing filter (defaults to now).
+        Runs on the capture worker threads, so the server is read once: stop_server may clear it meanwhile.
+        """
+        server = self.server_thread
+        if server is None:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        if self.smoothing_enabled:
+            keypoints = self._smooth(keypoints, frame_id, timestamp)
+        server.publish(keypoints, frame_id, timestamp)
+
+    def _smooth(self, keypoints, frame_id, timestamp):
+        start = time.perf_counter()
+        with self._smooth_lock:
+            if self._smoother is None:
+                self._smoother = smoothing.OneEuroSmoother()
+            elif (self._last_frame_id is None or frame_id <= self._last_frame_id
+                  or timestamp <= self._last_pose_time
+                  or timestamp - self._last_pose_time > self.SMOOTHING_RESET_GAP):
+                # New source, rewind or tracking gap: don't blend with a stale pose
+                self._smoother.reset()
+            self._last_frame_id = frame_id
+            self._last_pose_time = timestamp
+            smoothed = self._smoother.step(keypoints, timestamp)
+        gui_perf.add_time('smoothing', time.perf_counter() - start)
+        return smoothed
 
     def start_server(self):
         if self.server_thread and self.server_thread.isRunning():
@@ -386,6 +933,8 @@ class LiveLinkTab(QWidget):
         self.server_thread = LiveLinkServerThread()
         self.server_thread.status_signal.connect(self.status_callback)
         self.server_thread.start()
+        if self.streaming_callback:
+            self.streaming_callback(True)
         self.status_callback("Starting WebSocket server...")
 
     def stop_server(self):
@@ -393,14 +942,69 @@ class LiveLinkTab(QWidget):
             self.server_thread.stop()
             self.server_thread.quit()
             self.server_thread.wait()
+            self.server_thread = None
+            if self.streaming_callback:
+                self.streaming_callback(False)
             self.status_callback("WebSocket server stopped.")
         else:
             self.status_callback("Server not running.")
 
+class PerfOverlay(QLabel):
+    """
+    Live performance readout drawn over the tabs. Shows each stage's mean time and rate over the last
+    refresh interval, from the difference between consecutive gui_perf snapshots.
+    """
+
+    def __init__(self, parent, interval_ms=1000):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet('QLabel { background-color: rgba(0, 0, 0, 170); color: #9EF01A; '
+                           'font-family: monospace; padding: 4px; }')
+        self.previous = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def set_enabled(self, enabled):
+        if enabled:
+            self.previous = gui_perf.snapshot()
+            self.setText("Collecting...")
+            self.adjustSize()
+            self.move(8, 32)
+            self.raise_()
+            self.show()
+            self.timer.start()
+        else:
+            self.timer.stop()
+            self.hide()
+
+    def refresh(self):
+        current = gui_perf.snapshot()
+        previous, self.previous = self.previous, current
+        interval = max(1e-6, current['elapsed_s'] - previous['elapsed_s'])
+        lines = []
+        for name, stats in current['timers'].items():
+            before = previous['timers'].get(name, {'total_s': 0.0, 'count': 0})
+            count = stats['count'] - before['count']
+            if count > 0:
+                mean_ms = 1000.0 * (stats['total_s'] - before['total_s']) / count
+                lines.append(f"{name:<24}{mean_ms:8.2f} ms {count / interval:7.1f}/s")
+        for name, value in current['counters'].items():
+            delta = value - previous['counters'].get(name, 0)
+            if delta:
+                lines.append(f"{name:<24}{delta / interval:11.1f}/s")
+        self.setText("\n".join(lines) or "idle")
+        self.adjustSize()
+
 class MainWindow(QWidget):
-    def __init__(self):
+    preload_finished = pyqtSignal(str)
+
+    def __init__(self, perf_json=None):
         super().__init__()
         self.setWindowTitle("Animation Extraction GUI")
+        # Where to write the gui_perf summary when the window closes (--perf-json)
+        self.perf_json = perf_json
         self.tabs = QTabWidget()
         self.status_box = QTextEdit()
         self.status_box.setReadOnly(True)
@@ -408,6 +1012,9 @@ class MainWindow(QWidget):
         self.video_tab = VideoTab(self.update_status)
         self.audio_tab = AudioTab(self.update_status)
         self.livelink_tab = LiveLinkTab(self.update_status)
+        self.camera_tab.pose_callback = self.livelink_tab.publish
+        self.video_tab.pose_callback = self.livelink_tab.publish
+        self.livelink_tab.streaming_callback = self.set_stream_poses
         self.tabs.addTab(self.camera_tab, "Live Camera")
         self.tabs.addTab(self.video_tab, "Video File")
         self.tabs.addTab(self.audio_tab, "Audio/Phoneme")
@@ -420,7 +1027,11 @@ class MainWindow(QWidget):
         self.font_slider.setTickPosition(QSlider.TicksBelow)
         self.font_slider.valueChanged.connect(self.change_font_size)
         font_label = QLabel("Font Size:")
+        self.perf_overlay = PerfOverlay(self.tabs)
+        self.perf_checkbox = QCheckBox("Performance overlay")
+        self.perf_checkbox.toggled.connect(self.perf_overlay.set_enabled)
         font_row = QHBoxLayout()
+        font_row.addWidget(self.perf_checkbox)
         font_row.addStretch(1)
         font_row.addWidget(font_label)
         font_row.addWidget(self.font_slider)
@@ -431,17 +1042,58 @@ class MainWindow(QWidget):
         layout.addWidget(self.status_box)
         layout.addLayout(font_row)
         self.setLayout(layout)
+        self.preload_finished.connect(self.update_status)
 
     def update_status(self, msg):
         self.status_box.append(msg)
 
+    def set_stream_poses(self, enabled):
+        self.camera_tab.set_stream_poses(enabled)
+        self.video_tab.set_stream_poses(enabled)
+
+    def startup_complete(self):
+        """Called once the window is on screen: log the startup report, then warm up the heavy imports."""
+        startup_report.mark("first window")
+        gui_perf.set_info(startup_ms={label: round(ms, 1) for label, ms in startup_report.marks})
+        summary = startup_report.summary()
+        print(summary, file=sys.stderr)
+        self.update_status(summary)
+        self.start_preload()
+
+    def start_preload(self):
+        def done(timings):
+            parts = []
+            for name, seconds, error in timings:
+                parts.append(f"{name} failed ({error})" if error else f"{name} {seconds * 1000:.0f} ms")
+            self.preload_finished.emit("Preloaded in background: " + ", ".join(parts))
+        preload_in_background(PRELOAD_MODULES, done)
+
+    def closeEvent(self, event):
+        # Stop background capture threads before the widgets they paint into go away
+        self.camera_tab.stop_camera()
+        self.video_tab.stop_worker()
+        if self.video_tab.extraction_worker is not None:
+            self.video_tab.extraction_worker.cancel()
+            self.video_tab.extraction_worker.wait()
+        if self.perf_json:
+            try:
+                gui_perf.write_json(self.perf_json)
+            except OSError as e:
+                print(f"Failed to write performance summary: {e}", file=sys.stderr)
+        super().closeEvent(event)
+
     def change_font_size(self, value):
         font = QApplication.instance().font()
         font.setPointSize(value)
         QApplication.instance().setFont(font)
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    arg_parser = argparse.ArgumentParser(description="Veewoy animation extraction GUI")
+    arg_parser.add_argument('--perf-json', default=None,
+                            help='Write a performance summary (timers and counters) to this JSON file on exit')
+    # Qt consumes its own options (e.g. -style) from the remaining arguments
+    args, qt_args = arg_parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
     # Set the app icon globally (shows in taskbar and window frame)
     app.setWindowIcon(QIcon('assets/veewoy.ico'))
     # Load Inter font
@@ -478,7 +1130,9 @@ if __name__ == '__main__':
             color: #F0F0F0;
         }
     ''')
-    win = MainWindow()
+    startup_report.mark("QApplication ready")
+    win = MainWindow(perf_json=args.perf_json)
+    startup_report.mark("window built")
     win.setWindowIcon(QIcon('assets/veewoy.ico'))
     # Optionally show a system tray icon
     try:
@@ -489,4 +1143,6 @@ if __name__ == '__main__':
     except Exception:
         pass
     win.show()
+    # Fires once the event loop is running, i.e. after the window has been shown
+    QTimer.singleShot(0, win.startup_complete)
     sys.exit(app.exec_()) 
\ No newline at end of file